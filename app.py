@@ -1,7 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
 from task_agent.rl_model import RLModel
 from task_agent.langchain_agent import LangChainTaskAgent
 from task_agent.database import TaskDatabase
+from task_agent.task_store import get_task_cache
+from task_agent.replay import ReplayBuffer, ReplayTrainer
+from task_agent.feedback_queue import FeedbackQueue, QueueFull
+from task_agent.metrics import REGISTRY, SUGGEST_STAGE, MetricsMiddleware
+from task_agent.tenants import DEFAULT_TENANT, Tenant, TenantManager, TenantPathMiddleware, attach_task_store
 import json
 import os
 from pathlib import Path
@@ -15,30 +25,136 @@ def load_env():
                 line = line.strip()
                 if line and not line.startswith('#') and '=' in line:
                     key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+                    # Drop inline comments: KEY=value  # note
+                    os.environ[key.strip()] = value.split(' #', 1)[0].strip()
 
 load_env()  # Load environment variables
 
 app = FastAPI(title="RL Task Agent API", version="2.0.0")
+app.add_middleware(MetricsMiddleware)
+# Added last so it runs first: /t/{tenant_id}/... is routed like the plain path
+app.add_middleware(TenantPathMiddleware)
 
 # Initialize components
 rl = RLModel()
-langchain_agent = LangChainTaskAgent()
+langchain_agent = LangChainTaskAgent(rl=rl)
 use_sqlite = os.getenv("USE_SQLITE", "false").lower() == "true"
+task_cache = get_task_cache("task_agent/data/tasks.json")
 
 if use_sqlite:
     db = TaskDatabase()
-    db.migrate_from_json()
+    # The loaded model, not its snapshot file: that can be older than its journal
+    db.migrate_from_json(load_q_values=rl.q_table_dict)
+    if rl.backend == "linear":
+        # Feedback can arrive for tasks the policy has not scored yet
+        rl.q_table.lookup = lambda task_key: db.get_task(int(task_key))
+else:
+    # SQLite ranks in-database; the JSON store uses an in-memory index
+    attach_task_store(rl, task_cache)
+
+# Requests without a tenant ID use the global model and task store above;
+# other tenants get their own, loaded on demand under TENANT_DATA_DIR
+default_tenant = Tenant(DEFAULT_TENANT, rl, task_cache)
+tenants = TenantManager(
+    data_dir=os.getenv("TENANT_DATA_DIR", "task_agent/data/tenants"),
+    max_resident=int(os.getenv("TENANT_MAX_RESIDENT", "100"))
+)
+
+def current_tenant(x_tenant_id: Optional[str] = Header(None)):
+    """Resolve the X-Tenant-ID header (or /t/{tenant_id}/ prefix), pinned for the request"""
+    if x_tenant_id is None or x_tenant_id == DEFAULT_TENANT:
+        yield default_tenant
+        return
+    if use_sqlite:
+        raise HTTPException(status_code=400, detail="Tenants need the JSON task store (USE_SQLITE=false)")
+    try:
+        tenant = tenants.acquire(x_tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        yield tenant
+    finally:
+        tenants.release(tenant)
+
+def choose_sqlite_task(rl):
+    """Epsilon-greedy choice in SQLite mode"""
+    if rl.backend == "linear":
+        # Linear values are predictions from task features, not q_values rows
+        return rl.choose_action("state", db.get_all_tasks())
+    return db.choose_task(rl.epsilon)
+
+def mirror_to_sqlite(results):
+    """Copy update_q_values results into the SQLite q_value column"""
+    db.update_q_values({key: change["new_q"] for key, change in results.items()})
+
+# Experience replay: feedback endpoints only append transitions and a
+# background trainer applies bootstrapped mini-batch updates
+replay = None
+if os.getenv("RL_REPLAY", "false").lower() == "true":
+    replay = ReplayTrainer(
+        rl,
+        ReplayBuffer(int(os.getenv("RL_REPLAY_CAPACITY", "100000"))),
+        batch_size=int(os.getenv("RL_REPLAY_BATCH_SIZE", "64")),
+        interval=float(os.getenv("RL_REPLAY_INTERVAL", "1.0")),
+        batches_per_tick=int(os.getenv("RL_REPLAY_BATCHES_PER_TICK", "4")),
+        on_update=mirror_to_sqlite if use_sqlite else None
+    )
+    replay.start()
+
+# Write-behind feedback: endpoints acknowledge with a sequence number and a
+# background thread applies queued rewards with one coalesced update and write
+feedback_queue = None
+if replay is None and os.getenv("FEEDBACK_WRITE_BEHIND", "false").lower() == "true":
+    feedback_queue = FeedbackQueue(
+        rl,
+        interval=float(os.getenv("FEEDBACK_FLUSH_INTERVAL", "0.05")),
+        max_pending=int(os.getenv("FEEDBACK_MAX_PENDING", "1000")),
+        on_update=mirror_to_sqlite if use_sqlite else None
+    )
+    feedback_queue.start()
+
+def require_learnable(rl, task_ids):
+    """Reject feedback the model could never apply, before it is queued"""
+    for task_id in task_ids:
+        if not rl.can_learn(task_id):
+            raise KeyError(f"No features for task {task_id}: not in the task store")
+
+def record_transition(task_id, reward):
+    """Append feedback to the replay buffer; the available-task snapshot is rebuilt only when tasks change"""
+    if use_sqlite:
+        return replay.buffer.append(task_id, reward, db.version,
+                                    lambda: [row['task_id'] for row in db.get_ranked_tasks(limit=-1)])
+    task_cache.refresh()
+    return replay.buffer.append(task_id, reward, task_cache.version,
+                                lambda: [t['task_id'] for t in task_cache.get_all() if t.get('status') != 'done'])
+
+class FeedbackItem(BaseModel):
+    task_id: int
+    reward: float
+
+@app.on_event("shutdown")
+def shutdown():
+    """Flush pending Q-table writes and close pooled connections"""
+    if replay is not None:
+        replay.stop()
+        if replay.stats()["pending"]:
+            replay.train(replay.batches_per_tick)
+    if feedback_queue is not None:
+        feedback_queue.close()
+    rl.close()
+    tenants.close()
+    langchain_agent.health.stop()
+    if use_sqlite:
+        db.close()
 
 def detect_llm_capabilities():
-    """Detect available LLM providers"""
-    gemini_key = os.getenv("GEMINI_API_KEY")
-    hf_key = os.getenv("HUGGINGFACE_API_KEY")
+    """Detect available LLM providers (cached by the background health prober)"""
+    health = langchain_agent.health
     
     return {
-        "gemini": gemini_key is not None and gemini_key != "your_gemini_api_key_here",
-        "huggingface": hf_key is not None and hf_key != "your_huggingface_api_key_here",
-        "ollama": langchain_agent.llm_type == "ollama",
+        "gemini": health.is_available("gemini"),
+        "huggingface": health.is_available("huggingface"),
+        "ollama": health.is_available("ollama"),
         "active_llm": langchain_agent.llm_type,
         "env_loaded": True
     }
@@ -49,130 +165,307 @@ def home():
     return {
         "message": "RL Task Agent API",
         "version": "2.0.0",
-        "endpoints": ["/tasks", "/tasks/{status}", "/suggest", "/feedback/{task_id}/{reward}", "/complete/{task_id}", "/stats"],
+        "endpoints": ["/tasks", "/tasks/{status}", "/tasks/bulk", "/suggest", "/suggest/stream", "/recommendations", "/feedback/{task_id}/{reward}", "/feedback/batch", "/feedback/status/{seq}", "/complete/{task_id}", "/stats", "/qtable", "/tenants", "/metrics", "/replay/train"],
         "features": {
             "sqlite": use_sqlite,
-            "langchain": langchain_agent.llm is not None,
+            "langchain": langchain_agent.llm_type != "none",
             **llm_status
         }
     }
 
 @app.get("/tasks")
-def get_tasks():
+def get_tasks(tenant: Tenant = Depends(current_tenant)):
     """Get all tasks"""
     try:
         if use_sqlite:
             tasks = db.get_all_tasks()
         else:
-            with open("task_agent/data/tasks.json", "r") as f:
-                tasks = json.load(f)
+            tasks = tenant.tasks.get_all()
         return {"tasks": tasks, "count": len(tasks)}
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Tasks not found")
 
+def parse_task_line(line, line_number):
+    """Parse one NDJSON task line"""
+    try:
+        task = json.loads(line)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON on line {line_number}")
+    if not isinstance(task, dict) or 'task_id' not in task or 'name' not in task:
+        raise HTTPException(status_code=400, detail=f"Line {line_number} needs task_id and name")
+    task.setdefault('status', 'pending')
+    task.setdefault('reward', 0)
+    return task
+
+@app.post("/tasks/bulk")
+async def add_tasks_bulk(request: Request, tenant: Tenant = Depends(current_tenant)):
+    """Stream NDJSON tasks (one JSON object per line) into the task store"""
+    tasks = []
+    line_number = 0
+    buffer = b""
+    
+    # Every line is validated before anything is written, so a bad line
+    # rejects the whole upload in both modes
+    async for chunk in request.stream():
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                tasks.append(parse_task_line(line, line_number))
+    
+    if buffer.strip():
+        tasks.append(parse_task_line(buffer, line_number + 1))
+    if tasks:
+        # One transaction (SQLite) or one file rewrite (JSON)
+        if use_sqlite:
+            await run_in_threadpool(db.add_tasks, tasks)
+        else:
+            await run_in_threadpool(tenant.tasks.add_tasks, tasks)
+    
+    return {"added": len(tasks), "method": "sqlite" if use_sqlite else "json"}
+
 @app.get("/tasks/{status}")
-def get_tasks_by_status(status: str):
+def get_tasks_by_status(status: str, tenant: Tenant = Depends(current_tenant)):
     """Get tasks by status"""
     try:
         if use_sqlite:
             tasks = db.get_tasks_by_status(status)
         else:
-            with open("task_agent/data/tasks.json", "r") as f:
-                all_tasks = json.load(f)
-            tasks = [t for t in all_tasks if t.get('status') == status]
+            tasks = tenant.tasks.get_by_status(status)
         return {"tasks": tasks, "count": len(tasks), "status": status}
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Tasks not found")
 
 @app.post("/suggest")
-def suggest_task():
+async def suggest_task(tenant: Tenant = Depends(current_tenant)):
     """Get intelligent task suggestion with multi-LLM support"""
+    rl = tenant.rl
     try:
-        if use_sqlite:
-            tasks = db.get_all_tasks()
-        else:
-            with open("task_agent/data/tasks.json", "r") as f:
-                tasks = json.load(f)
+        with SUGGEST_STAGE.time(stage="load_tasks"):
+            if use_sqlite:
+                # Rank inside SQLite so only the chosen row reaches Python
+                chosen = await run_in_threadpool(choose_sqlite_task, rl)
+                tasks = [chosen] if chosen else []
+            else:
+                tasks = await run_in_threadpool(tenant.tasks.get_all)
         
-        # Try LangChain agent with multi-LLM support
-        if langchain_agent.llm:
-            result = langchain_agent.suggest_task_with_reasoning(tasks)
-            return {
+        # Try LangChain agent with multi-LLM support (hedged across providers).
+        # Only cached health is checked here: the provider calls run in threads
+        # and build clients (or load a local model) there, off the event loop.
+        if langchain_agent.llm_type != "none":
+            result = await langchain_agent.asuggest_task_with_reasoning(tasks, rl=rl)
+            result = {
                 **result,
-                "llm_provider": langchain_agent.llm_type,
+                # The provider that answered, which may be a hedged fallback
+                "llm_provider": result.get("llm_used", langchain_agent.llm_type),
                 "method": "langchain_multi_llm"
             }
         else:
             # Fallback to RL-only
-            chosen = rl.choose_action("state", tasks, epsilon=0.2)
+            with SUGGEST_STAGE.time(stage="rl_selection"):
+                chosen = await run_in_threadpool(rl.choose_action, "state", tasks)
             if not chosen:
                 return {"error": "No available tasks"}
             
             q_value = rl.q_table.get(str(chosen['task_id']), 0)
-            return {
+            result = {
                 "task": chosen,
                 "q_value": round(q_value, 3),
                 "reasoning": f"RL-only selection (Q-value: {q_value:.3f}). No LLM available.",
                 "llm_provider": "none",
                 "method": "rl_only"
             }
+        
+        with SUGGEST_STAGE.time(stage="serialize"):
+            return JSONResponse(jsonable_encoder(result))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/suggest/stream")
+def suggest_task_stream(tenant: Tenant = Depends(current_tenant)):
+    """Stream a task suggestion: the RL choice first, then LLM reasoning tokens as SSE"""
+    rl = tenant.rl
+    if use_sqlite:
+        chosen = choose_sqlite_task(rl)
+    else:
+        chosen = rl.choose_action("state", tenant.tasks.get_all())
+    
+    def events():
+        if not chosen:
+            yield sse_event("error", {"error": "No available tasks"})
+            return
+        
+        yield sse_event("task", {
+            "task": chosen,
+            "q_value": rl.q_table.get(str(chosen['task_id']), 0),
+            "llm_provider": langchain_agent.llm_type
+        })
+        reasoning = []
+        for token in langchain_agent.stream_reasoning(chosen, rl=rl):
+            reasoning.append(token)
+            yield sse_event("token", {"text": token})
+        yield sse_event("done", {"reasoning": "".join(reasoning).strip()})
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/recommendations")
+def get_recommendations(limit: int = 10, offset: int = 0, tenant: Tenant = Depends(current_tenant)):
+    """Get available tasks ranked by Q-value, paginated"""
+    if limit < 1 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be >= 1 and offset >= 0")
+    
+    try:
+        if use_sqlite and tenant.rl.backend == "linear":
+            ranked = tenant.rl.top_k(db.get_all_tasks(), k=limit, offset=offset)
+        elif use_sqlite:
+            ranked = [(task, task['q_value']) for task in db.get_ranked_tasks(limit=limit, offset=offset)]
+        else:
+            ranked = tenant.rl.top_k(tenant.tasks.get_all(), k=limit, offset=offset)
+        return {
+            "recommendations": [
+                {"rank": offset + i, "task_id": task['task_id'], "name": task['name'], "q_value": round(q_value, 3)}
+                for i, (task, q_value) in enumerate(ranked, 1)
+            ],
+            "limit": limit,
+            "offset": offset
+        }
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Tasks not found")
+
 @app.post("/feedback/{task_id}/{reward}")
-def update_feedback(task_id: int, reward: float):
+def update_feedback(task_id: int, reward: float, tenant: Tenant = Depends(current_tenant)):
     """Update task feedback and Q-learning"""
     if not 0 <= reward <= 1:
         raise HTTPException(status_code=400, detail="Reward must be 0-1")
     
     try:
-        result = rl.update_q_value(task_id, reward)
+        if replay is not None and tenant is default_tenant:
+            require_learnable(rl, [task_id])
+            return {
+                "task_id": task_id,
+                "reward": reward,
+                "sequence": record_transition(task_id, reward),
+                "method": "replay_buffered"
+            }
+        if feedback_queue is not None and tenant is default_tenant:
+            require_learnable(rl, [task_id])
+            return {
+                "task_id": task_id,
+                "reward": reward,
+                "sequence": feedback_queue.submit(task_id, reward),
+                "method": "write_behind"
+            }
+        
+        result = tenant.rl.update_q_value(task_id, reward)
+        if use_sqlite:
+            db.update_q_value(task_id, result['new_q'])
         return {
             "task_id": task_id,
             "reward": reward,
             "q_value_change": f"{result['old_q']:.3f} -> {result['new_q']:.3f}",
             "method": "q_learning_update"
         }
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except KeyError as e:
+        # The linear backend cannot learn about a task it has no features for
+        raise HTTPException(status_code=404, detail=str(e.args[0]) if e.args else "Task not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/feedback/batch")
+def update_feedback_batch(items: List[FeedbackItem], tenant: Tenant = Depends(current_tenant)):
+    """Apply a burst of rewards in one vectorized Q-learning pass"""
+    if any(not 0 <= item.reward <= 1 for item in items):
+        raise HTTPException(status_code=400, detail="Reward must be 0-1")
+    
+    try:
+        if replay is not None and tenant is default_tenant:
+            require_learnable(rl, [item.task_id for item in items])
+            sequences = [record_transition(item.task_id, item.reward) for item in items]
+            return {
+                "sequences": sequences,
+                "count": len(items),
+                "method": "replay_buffered"
+            }
+        if feedback_queue is not None and tenant is default_tenant:
+            require_learnable(rl, [item.task_id for item in items])
+            return {
+                "sequence": feedback_queue.submit_many([item.task_id for item in items], [item.reward for item in items]),
+                "count": len(items),
+                "method": "write_behind"
+            }
+        
+        results = tenant.rl.update_q_values([item.task_id for item in items], [item.reward for item in items])
+        if use_sqlite:
+            db.update_q_values({task_id: change["new_q"] for task_id, change in results.items()})
+        return {
+            "updated": [
+                {"task_id": int(task_id), "old_q": change["old_q"], "new_q": change["new_q"]}
+                for task_id, change in results.items()
+            ],
+            "count": len(items),
+            "method": "q_learning_batch_update"
+        }
+    except QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]) if e.args else "Task not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/feedback/status/{seq}")
+def get_feedback_status(seq: int, wait: float = 0):
+    """Whether write-behind feedback up to seq has been applied; wait up to `wait` seconds for it"""
+    if feedback_queue is None:
+        raise HTTPException(status_code=400, detail="Write-behind feedback is disabled (set FEEDBACK_WRITE_BEHIND=true)")
+    if wait > 0 and 1 <= seq <= feedback_queue.submitted:
+        feedback_queue.wait(seq, timeout=min(wait, 30.0))
+    return {"sequence": seq, "status": feedback_queue.status(seq), "applied_through": feedback_queue.applied}
+
 @app.post("/complete/{task_id}")
-def complete_task(task_id: int):
+def complete_task(task_id: int, tenant: Tenant = Depends(current_tenant)):
     """Mark task as completed"""
     try:
+        tenant.rl.set_task_status(task_id, "done")
         if use_sqlite:
             db.update_task_status(task_id, "done")
             return {"task_id": task_id, "status": "done", "method": "sqlite"}
         else:
-            with open("task_agent/data/tasks.json", "r") as f:
-                tasks = json.load(f)
-            
-            for task in tasks:
-                if task["task_id"] == task_id:
-                    task["status"] = "done"
-                    break
-            else:
+            if tenant.tasks.update_status(task_id, "done") is None:
                 raise HTTPException(status_code=404, detail="Task not found")
             
-            with open("task_agent/data/tasks.json", "w") as f:
-                json.dump(tasks, f, indent=2)
-            
             return {"task_id": task_id, "status": "done", "method": "json"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/stats")
-def get_stats():
-    """Get RL statistics and system status"""
+def get_stats(tenant: Tenant = Depends(current_tenant)):
+    """Get RL statistics and system status (the Q-table itself is paged by /qtable)"""
+    rl = tenant.rl
     try:
         stats = rl.get_task_statistics()
         llm_status = detect_llm_capabilities()
         
         return {
             "rl_stats": stats,
-            "q_table": rl.q_table,
             "llm_status": llm_status,
+            "reasoning_cache": langchain_agent.reasoning_cache.stats(),
+            "http_pool": langchain_agent.http.stats(),
+            "models": langchain_agent.models.stats(),
+            "replay": replay.stats() if replay is not None else None,
+            "feedback_queue": feedback_queue.stats() if feedback_queue is not None else None,
             "system": {
+                "tenant": tenant.tenant_id,
                 "sqlite_enabled": use_sqlite,
                 "total_q_entries": len(rl.q_table)
             }
@@ -180,6 +473,44 @@ def get_stats():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/qtable")
+def get_q_table(limit: int = 100, offset: int = 0, min_q: Optional[float] = None, max_q: Optional[float] = None,
+                order: str = "desc", tenant: Tenant = Depends(current_tenant)):
+    """Page through Q-table entries sorted by Q-value, optionally within [min_q, max_q]"""
+    if limit < 1 or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be >= 1 and offset >= 0")
+    if order not in ("desc", "asc"):
+        raise HTTPException(status_code=400, detail="order must be 'desc' or 'asc'")
+    
+    entries, total = tenant.rl.q_table_page(limit=limit, offset=offset, min_q=min_q, max_q=max_q, order=order)
+    return {
+        "entries": [{"task_id": task_key, "q_value": q_value} for task_key, q_value in entries],
+        "total": total,
+        "limit": limit,
+        "offset": offset
+    }
+
+@app.get("/tenants")
+def get_tenants():
+    """Resident tenants (most recently used first), loads, hits and evictions"""
+    return tenants.stats()
+
+@app.post("/replay/train")
+def train_replay(batches: int = 1):
+    """Run replay mini-batches now instead of waiting for the background trainer"""
+    if replay is None:
+        raise HTTPException(status_code=400, detail="Experience replay is disabled (set RL_REPLAY=true)")
+    try:
+        updates = replay.train(batches)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Replay training failed: {e}")
+    return {"batches": batches, "updates": updates, "replay": replay.stats()}
+
+@app.get("/metrics")
+def get_metrics():
+    """Request, /suggest stage, LLM, Q-update and SQLite timings in Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     import uvicorn
     import socket
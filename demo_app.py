@@ -1,28 +1,30 @@
 import streamlit as st
 import json
-import requests
 from pathlib import Path
 from task_agent.rl_model import RLModel
+from task_agent.http_client import get_http_client
 
-def local_llm(prompt: str, model: str = "llama3", timeout: int = 10):
-    """Send prompt to local Ollama"""
+def local_llm_stream(prompt: str, model: str = "llama3", timeout: int = 10):
+    """Send prompt to local Ollama, yielding tokens as they arrive"""
     try:
-        with requests.post("http://localhost:11434/api/generate", 
-                          json={"model": model, "prompt": prompt}, 
-                          stream=True, timeout=timeout) as r:
+        with get_http_client().stream("POST", "http://localhost:11434/api/generate", 
+                                      json={"model": model, "prompt": prompt}, 
+                                      timeout=timeout) as r:
             r.raise_for_status()
-            text = ""
             for line in r.iter_lines(decode_unicode=True):
                 if line:
                     try:
                         data = json.loads(line)
                         if "response" in data:
-                            text += data["response"]
+                            yield data["response"]
                     except:
                         continue
-            return text.strip()
     except Exception as e:
-        return f"Ollama not available. Using RL-only reasoning. Error: {str(e)}"
+        yield f"Ollama not available. Using RL-only reasoning. Error: {str(e)}"
+
+def local_llm(prompt: str, model: str = "llama3", timeout: int = 10):
+    """Send prompt to local Ollama"""
+    return "".join(local_llm_stream(prompt, model, timeout)).strip()
 
 st.set_page_config(page_title="RL Task Agent", layout="wide")
 st.title("🤖 RL Task Agent Demo")
@@ -84,9 +86,13 @@ with col2:
                 
                 # Get AI reasoning
                 prompt = f"Explain why '{chosen['name']}' is a good next task in 2 sentences."
-                reasoning = local_llm(prompt)
                 st.write("**Reasoning:**")
-                st.write(reasoning)
+                # Render tokens as Ollama streams them
+                placeholder = st.empty()
+                reasoning = ""
+                for token in local_llm_stream(prompt):
+                    reasoning += token
+                    placeholder.markdown(reasoning)
             else:
                 st.warning("No available tasks")
     
@@ -123,7 +129,7 @@ try:
         st.metric("Best Task", stats.get('best_task_id', 'N/A'))
     
     if st.checkbox("Show Q-Table"):
-        st.json(rl.q_table)
+        st.json(rl.q_table_dict())
         
 except Exception as e:
     st.error(f"Error loading stats: {e}")
@@ -3,21 +3,42 @@
 Simple API that follows the 6-step workflow
 """
 
-from fastapi import FastAPI
-import json
+from fastapi import FastAPI, HTTPException
 from task_agent.rl_model import RLModel
+from task_agent.task_store import get_task_cache
+from task_agent.tenants import attach_task_store
+from task_agent.feedback_queue import FeedbackQueue, QueueFull
+import os
 
 app = FastAPI(title="Simple RL Task Workflow")
 rl = RLModel()
+task_cache = get_task_cache("task_agent/data/tasks.json")
+attach_task_store(rl, task_cache)
+
+# Step 5 only queues the reward; see FEEDBACK_WRITE_BEHIND in .env.example
+feedback_queue = None
+if os.getenv("FEEDBACK_WRITE_BEHIND", "false").lower() == "true":
+    feedback_queue = FeedbackQueue(
+        rl,
+        interval=float(os.getenv("FEEDBACK_FLUSH_INTERVAL", "0.05")),
+        max_pending=int(os.getenv("FEEDBACK_MAX_PENDING", "1000"))
+    )
+    feedback_queue.start()
+
+@app.on_event("shutdown")
+def shutdown():
+    """Apply queued feedback and flush Q-table writes"""
+    if feedback_queue is not None:
+        feedback_queue.close()
+    rl.close()
 
 @app.get("/")
 def workflow_status():
     """Get current workflow state"""
-    with open("task_agent/data/tasks.json", "r") as f:
-        tasks = json.load(f)
+    tasks = task_cache.get_all()
     
-    pending = len([t for t in tasks if t['status'] == 'pending'])
-    completed = len([t for t in tasks if t['status'] == 'done'])
+    pending = len(task_cache.get_by_status('pending'))
+    completed = len(task_cache.get_by_status('done'))
     
     return {
         "step": "Ready for workflow",
@@ -29,10 +50,8 @@ def workflow_status():
 @app.post("/workflow/step3")
 def choose_next_task():
     """Step 3: Agent chooses next best task"""
-    with open("task_agent/data/tasks.json", "r") as f:
-        tasks = json.load(f)
-    
-    pending = [t for t in tasks if t['status'] == 'pending']
+    pending = task_cache.get_by_status('pending')
+    # The workflow explores less than /suggest (rl.epsilon)
     chosen = rl.choose_action("state", pending, epsilon=0.1)
     
     if not chosen:
@@ -50,6 +69,22 @@ def choose_next_task():
 @app.post("/workflow/step5/{task_id}/{reward}")
 def update_learning(task_id: int, reward: float):
     """Step 5: Update Q-table with reward"""
+    if feedback_queue is not None:
+        # Unknown tasks get a 404 now, not a failed sequence later
+        if not rl.can_learn(task_id):
+            raise HTTPException(status_code=404, detail=f"No features for task {task_id}: not in the task store")
+        try:
+            seq = feedback_queue.submit(task_id, reward)
+        except QueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+        return {
+            "step": 5,
+            "update": "Reward queued",
+            "task_id": task_id,
+            "reward": reward,
+            "sequence": seq
+        }
+    
     old_q = rl.q_table.get(str(task_id), 0)
     rl.update_q_value(task_id, reward)
     new_q = rl.q_table.get(str(task_id), 0)
@@ -62,30 +97,34 @@ def update_learning(task_id: int, reward: float):
         "q_value_change": f"{old_q:.3f} -> {new_q:.3f}"
     }
 
+@app.get("/feedback/status/{seq}")
+def get_feedback_status(seq: int, wait: float = 0):
+    """Whether queued rewards up to seq have been applied"""
+    if feedback_queue is None:
+        raise HTTPException(status_code=400, detail="Write-behind feedback is disabled")
+    if wait > 0 and 1 <= seq <= feedback_queue.submitted:
+        feedback_queue.wait(seq, timeout=min(wait, 30.0))
+    return {"sequence": seq, "status": feedback_queue.status(seq), "applied_through": feedback_queue.applied}
+
 @app.get("/workflow/step6")
 def get_recommendations():
     """Step 6: Get new task order recommendations"""
-    with open("task_agent/data/tasks.json", "r") as f:
-        tasks = json.load(f)
-    
-    pending = [t for t in tasks if t['status'] == 'pending']
+    pending = task_cache.get_by_status('pending')
     
-    # Sort by Q-values
-    recommendations = []
-    for task in pending:
-        q_val = rl.q_table.get(str(task['task_id']), 0)
-        recommendations.append({
+    # Top 10 by Q-value from the ranking index
+    recommendations = [
+        {
             "task_id": task['task_id'],
             "name": task['name'],
             "q_value": round(q_val, 3)
-        })
-    
-    recommendations.sort(key=lambda x: x['q_value'], reverse=True)
+        }
+        for task, q_val in rl.top_k(pending, 10)
+    ]
     
     return {
         "step": 6,
         "output": "Task recommendations",
-        "recommended_order": recommendations[:10]
+        "recommended_order": recommendations
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Binary memory-mapped Q-table format.
+
+Layout (little-endian):
+    header  32 bytes  magic "RLQB", format version, entry count, key width
+    keys    count * key width bytes, task IDs sorted, NUL-padded
+    values  count float64, 8-byte aligned, in key order
+
+Convert an existing JSON Q-table, or export one back to JSON:
+
+    python -m task_agent.binary_q_table to-binary task_agent/data/agent_memory.json task_agent/data/agent_memory.qbin
+    python -m task_agent.binary_q_table to-json task_agent/data/agent_memory.qbin agent_memory.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import struct
+import threading
+
+import numpy as np
+
+MAGIC = b"RLQB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIQI12x")
+MIN_KEY_BYTES = 8
+
+
+def _values_offset(count, key_bytes):
+    keys_end = HEADER.size + count * key_bytes
+    return (keys_end + 7) // 8 * 8
+
+
+def write_binary(path, data):
+    """Write a {task_id: q_value} mapping atomically in the binary format"""
+    keys = np.array([str(key).encode() for key in data], dtype=bytes)
+    values = np.fromiter((float(value) for value in data.values()), dtype="<f8", count=len(data))
+    write_arrays(path, keys, values)
+
+
+def write_arrays(path, keys, values):
+    """Write parallel key/value arrays (any order, unique keys) atomically"""
+    key_bytes = max(MIN_KEY_BYTES, keys.dtype.itemsize)
+    keys = keys.astype(f"S{key_bytes}")
+    order = np.argsort(keys, kind="stable")
+    count = len(keys)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, count, key_bytes))
+        f.write(keys[order].tobytes())
+        f.write(b"\0" * (_values_offset(count, key_bytes) - HEADER.size - count * key_bytes))
+        f.write(np.asarray(values, dtype="<f8")[order].tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    """(count, key_bytes) of a binary Q-table file"""
+    with open(path, "rb") as f:
+        magic, version, count, key_bytes = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a binary Q-table file")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"{path} has unsupported format version {version}")
+    return count, key_bytes
+
+
+class BinaryQTable:
+    """Q-table backed by a memory-mapped binary file.
+
+    Opening maps the file without parsing or copying it. Lookups binary-search
+    the sorted key array. Updates to existing tasks are written in place into
+    the mapping; new tasks are kept in an overlay dict until save() merges
+    them into a rewritten file.
+
+    The mapped keys, values and overlay are one tuple that save() replaces
+    in a single assignment, so readers never need the lock: they see either
+    the old file or the new one, never a half-swapped or closed table.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()  # Writers and save()
+        self._state = self._open() + ({},)
+
+    def _open(self):
+        """(keys, values) mapped from the file, or empty arrays if there is none"""
+        if not os.path.exists(self.path):
+            return np.empty(0, dtype=f"S{MIN_KEY_BYTES}"), np.empty(0, dtype="<f8")
+        count, key_bytes = read_header(self.path)
+        if count == 0:
+            return np.empty(0, dtype=f"S{key_bytes}"), np.empty(0, dtype="<f8")
+        keys = np.memmap(self.path, dtype=f"S{key_bytes}", mode="r", offset=HEADER.size, shape=(count,))
+        values = np.memmap(self.path, dtype="<f8", mode="r+",
+                           offset=_values_offset(count, key_bytes), shape=(count,))
+        return keys, values
+
+    @staticmethod
+    def _find(keys, task_key):
+        """Slot of a key in a mapped key array, or -1"""
+        encoded = task_key.encode()
+        if not len(keys) or len(encoded) > keys.dtype.itemsize:
+            return -1
+        slot = int(np.searchsorted(keys, encoded))
+        if slot < len(keys) and keys[slot] == encoded:
+            return slot
+        return -1
+
+    # Dict interface
+
+    def get(self, task_key, default=None):
+        keys, values, overlay = self._state
+        value = overlay.get(task_key)
+        if value is not None:
+            return value
+        slot = self._find(keys, task_key)
+        return float(values[slot]) if slot >= 0 else default
+
+    def __getitem__(self, task_key):
+        value = self.get(task_key)
+        if value is None:
+            raise KeyError(task_key)
+        return value
+
+    def __contains__(self, task_key):
+        keys, _, overlay = self._state
+        return task_key in overlay or self._find(keys, task_key) >= 0
+
+    def __setitem__(self, task_key, value):
+        with self._lock:
+            self._set(task_key, value)
+
+    def _set(self, task_key, value):
+        keys, values, overlay = self._state
+        slot = self._find(keys, task_key)
+        if slot >= 0:
+            values[slot] = value
+        else:
+            overlay[task_key] = float(value)
+
+    def update(self, items):
+        with self._lock:
+            for task_key, value in items:
+                self._set(task_key, value)
+
+    def __len__(self):
+        keys, _, overlay = self._state
+        return len(keys) + len(overlay)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        keys, _, overlay = self._state
+        return [key.decode() for key in keys.tolist()] + list(overlay)
+
+    def values(self):
+        _, values, overlay = self._state
+        return np.concatenate((np.asarray(values), np.fromiter(list(overlay.values()), dtype=np.float64)))
+
+    def items(self):
+        keys, values, overlay = self._state
+        mapped = zip([key.decode() for key in keys.tolist()], np.asarray(values).tolist())
+        return itertools.chain(mapped, list(overlay.items()))
+
+    def to_dict(self):
+        """Export as a plain dict (for JSON export and API responses)"""
+        return dict(self.items())
+
+    # Persistence
+
+    def flush(self):
+        """Sync in-place value updates to disk"""
+        values = self._state[1]
+        if isinstance(values, np.memmap):
+            values.flush()
+
+    def save(self):
+        """Rewrite the file if new tasks were added.
+
+        In-place updates need no write: they are already in the shared page
+        cache and survive a process crash. close() msyncs them to disk.
+        The new file is written to a temporary path and renamed over the old
+        one, whose mapping stays readable until the new one is swapped in.
+        """
+        with self._lock:
+            keys, values, overlay = self._state
+            if not overlay and os.path.exists(self.path):
+                return
+            new_keys = np.array([key.encode() for key in overlay], dtype=bytes)
+            width = max(keys.dtype.itemsize, new_keys.dtype.itemsize)
+            write_arrays(
+                self.path,
+                np.concatenate((keys.astype(f"S{width}"), new_keys.astype(f"S{width}"))),
+                np.concatenate((np.asarray(values), np.fromiter(overlay.values(), dtype=np.float64)))
+            )
+            self._state = self._open() + ({},)
+
+    def close(self):
+        self.flush()
+        self._state = None
+
+
+def json_to_binary(json_path, binary_path):
+    """Convert a JSON Q-table to the binary format; returns the entry count"""
+    with open(json_path, "r") as f:
+        data = json.load(f)
+    write_binary(binary_path, data)
+    return len(data)
+
+
+def binary_to_json(binary_path, json_path):
+    """Export a binary Q-table as JSON; returns the entry count"""
+    table = BinaryQTable(binary_path)
+    data = table.to_dict()
+    table.close()
+    tmp_path = f"{json_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, json_path)
+    return len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert Q-tables between JSON and the binary format")
+    parser.add_argument("command", choices=["to-binary", "to-json"])
+    parser.add_argument("source")
+    parser.add_argument("destination")
+    args = parser.parse_args()
+
+    if args.command == "to-binary":
+        count = json_to_binary(args.source, args.destination)
+    else:
+        count = binary_to_json(args.source, args.destination)
+    print(f"Converted {count} Q-values: {args.source} -> {args.destination}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,138 @@
 import sqlite3
 import json
+import os
+import queue
+import random
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from task_agent.metrics import timed_query
+
+# Schema migrations, applied in order on startup. PRAGMA user_version
+# records how many have run, so append new steps instead of editing old ones.
+MIGRATIONS = [
+    # 1: status lookups and Q-value ranking
+    [
+        # Covers SELECT * ... WHERE status = ? without touching the table
+        "CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, task_id, name, reward)",
+        "CREATE INDEX IF NOT EXISTS idx_q_values_q ON q_values (q_value DESC)",
+    ],
+    # 2: bookkeeping for idempotent JSON migration
+    [
+        "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    ],
+]
+
+# Available tasks joined with their Q-values (0.0 if never rewarded)
+RANKED_TASKS_SQL = """
+    SELECT t.task_id, t.name, t.status, t.reward, COALESCE(q.q_value, 0.0) AS q_value
+    FROM tasks t
+    LEFT JOIN q_values q ON q.task_id = CAST(t.task_id AS TEXT)
+    WHERE t.status != ?
+"""
+
+# The same ranking (Q-value DESC, task_id) as three segments that each walk an
+# index and stop at LIMIT: positive Q-values down idx_q_values_q, then Q = 0
+# and never-rewarded tasks in task_id (rowid) order, then negative Q-values.
+# A single ORDER BY over the LEFT JOIN would scan and sort every task.
+_RANKED_BY_Q_SQL = """
+    SELECT t.task_id, t.name, t.status, t.reward, q.q_value
+    FROM q_values q INDEXED BY idx_q_values_q
+    JOIN tasks t ON t.task_id = CAST(q.task_id AS INTEGER)
+    WHERE q.q_value {} 0.0 AND t.status != ?
+    ORDER BY q.q_value DESC, t.task_id
+"""
+RANKED_SEGMENTS_SQL = (
+    _RANKED_BY_Q_SQL.format(">"),
+    """
+    SELECT t.task_id, t.name, t.status, t.reward, 0.0 AS q_value
+    FROM tasks t
+    LEFT JOIN q_values q ON q.task_id = CAST(t.task_id AS TEXT)
+    WHERE t.status != ? AND COALESCE(q.q_value, 0.0) = 0.0
+    ORDER BY t.task_id
+    """,
+    _RANKED_BY_Q_SQL.format("<"),
+)
+
+UPSERT_TASK_SQL = "INSERT OR REPLACE INTO tasks (task_id, name, status, reward) VALUES (?, ?, ?, ?)"
+UPSERT_Q_VALUE_SQL = "INSERT OR REPLACE INTO q_values (task_id, q_value) VALUES (?, ?)"
+
+def _task_rows(tasks):
+    return ((task['task_id'], task['name'], task.get('status', 'pending'), task.get('reward', 0.0))
+            for task in tasks)
 
 class TaskDatabase:
-    def __init__(self, db_path="task_agent/data/tasks.db"):
+    def __init__(self, db_path="task_agent/data/tasks.db", pool_size=None):
         self.db_path = db_path
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.pool_size = pool_size or int(os.getenv("SQLITE_POOL_SIZE", "8"))
+        self._pool = queue.LifoQueue()
+        self._created = 0
+        self._pool_lock = threading.Lock()
+        # SQLite allows one writer at a time; serialize writers in-process
+        # instead of spinning on SQLITE_BUSY
+        self._write_lock = threading.Lock()
+        # Bumped on every task write, so callers can cache task-set snapshots
+        self.version = 0
         self.init_db()
     
+    def _new_connection(self):
+        """Open a connection tuned for concurrent readers and one writer"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")  # readers don't block on the writer
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints, safe with WAL
+        conn.execute("PRAGMA cache_size=-16000")  # ~16 MB page cache per connection
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+    
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection"""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._pool_lock:
+                if self._created < self.pool_size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    conn = self._new_connection()
+                except Exception:
+                    with self._pool_lock:
+                        self._created -= 1
+                    raise
+            else:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+    
+    @contextmanager
+    def _transaction(self):
+        """Borrow a pooled connection for a write transaction"""
+        with self._write_lock, self._connection() as conn, conn:
+            yield conn
+    
+    def close(self):
+        """Close all pooled connections"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._pool_lock:
+                self._created -= 1
+    
     def init_db(self):
         """Initialize SQLite database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS tasks (
                     task_id INTEGER PRIMARY KEY,
@@ -26,66 +148,166 @@ class TaskDatabase:
                     q_value REAL DEFAULT 0.0
                 )
             """)
+        
+        self.migrate_schema()
     
+    def migrate_schema(self):
+        """Apply pending schema migrations"""
+        with self._transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= len(MIGRATIONS):
+                return
+            
+            conn.execute("BEGIN")
+            for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+    
+    @timed_query
+    def get_ranked_tasks(self, limit=10, offset=0, exclude_status="done"):
+        """Get available tasks with their Q-values, best first, ranked inside SQLite (limit=-1 for all)"""
+        return self._ranked_tasks(limit, offset, exclude_status)
+    
+    def _ranked_tasks(self, limit, offset, exclude_status):
+        rows = []
+        with self._connection() as conn:
+            for sql in RANKED_SEGMENTS_SQL:
+                if 0 <= limit <= len(rows):
+                    break
+                page = conn.execute(sql + " LIMIT ? OFFSET ?",
+                                    (exclude_status, limit - len(rows) if limit >= 0 else -1, offset)).fetchall()
+                rows.extend(page)
+                if page:
+                    offset = 0
+                elif offset:
+                    # The whole segment was skipped: only its size counts against the offset
+                    skipped = conn.execute(f"SELECT COUNT(*) FROM ({sql})", (exclude_status,)).fetchone()[0]
+                    offset = max(0, offset - skipped)
+        return [dict(row) for row in rows]
+    
+    @timed_query
+    def choose_task(self, epsilon=0.2, exclude_status="done"):
+        """Epsilon-greedy choice over available tasks without loading them into Python"""
+        if random.random() >= epsilon:
+            ranked = self._ranked_tasks(1, 0, exclude_status)
+            return ranked[0] if ranked else None
+        
+        with self._connection() as conn:
+            row = conn.execute(RANKED_TASKS_SQL + " ORDER BY RANDOM() LIMIT 1", (exclude_status,)).fetchone()
+            return dict(row) if row else None
+    
+    @timed_query
     def get_all_tasks(self):
         """Get all tasks"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             cursor = conn.execute("SELECT * FROM tasks")
             return [dict(row) for row in cursor.fetchall()]
     
+    @timed_query
+    def get_task(self, task_id):
+        """Get one task, or None"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+            return dict(row) if row else None
+    
+    @timed_query
     def get_tasks_by_status(self, status):
         """Get tasks by status"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
+        with self._connection() as conn:
             cursor = conn.execute("SELECT * FROM tasks WHERE status = ?", (status,))
             return [dict(row) for row in cursor.fetchall()]
     
+    @timed_query
     def add_task(self, task_id, name, status="pending"):
         """Add new task"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             conn.execute("INSERT OR REPLACE INTO tasks (task_id, name, status) VALUES (?, ?, ?)", 
                         (task_id, name, status))
+        self.version += 1
     
+    @timed_query
     def update_task_status(self, task_id, status, reward=None):
         """Update task status and reward"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             if reward is not None:
                 conn.execute("UPDATE tasks SET status = ?, reward = ? WHERE task_id = ?", 
                            (status, reward, task_id))
             else:
                 conn.execute("UPDATE tasks SET status = ? WHERE task_id = ?", (status, task_id))
+        self.version += 1
     
+    @timed_query
     def get_q_table(self):
         """Get Q-table as dictionary"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.execute("SELECT task_id, q_value FROM q_values")
             return {row[0]: row[1] for row in cursor.fetchall()}
     
+    @timed_query
     def update_q_value(self, task_id, q_value):
         """Update Q-value"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._transaction() as conn:
             conn.execute("INSERT OR REPLACE INTO q_values (task_id, q_value) VALUES (?, ?)", 
                         (str(task_id), q_value))
     
-    def migrate_from_json(self):
-        """Migrate from JSON to SQLite"""
-        try:
-            # Migrate tasks
-            with open("task_agent/data/tasks.json", 'r') as f:
-                tasks = json.load(f)
+    @timed_query
+    def update_q_values(self, q_values):
+        """Update many Q-values in one transaction"""
+        with self._transaction() as conn:
+            conn.executemany(UPSERT_Q_VALUE_SQL, ((str(task_id), q_value) for task_id, q_value in q_values.items()))
+    
+    @timed_query
+    def add_tasks(self, tasks):
+        """Insert or replace many tasks in one transaction"""
+        with self._transaction() as conn:
+            cursor = conn.executemany(UPSERT_TASK_SQL, _task_rows(tasks))
+        self.version += 1
+        return cursor.rowcount
+    
+    def get_meta(self, key):
+        """Get a value from the meta table"""
+        with self._connection() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+    
+    @timed_query
+    def migrate_from_json(self, tasks_path="task_agent/data/tasks.json",
+                          memory_path="task_agent/data/agent_memory.json", load_q_values=None):
+        """Migrate from JSON to SQLite.
+        
+        Each source file is loaded with a single executemany transaction, and
+        skipped entirely when its mtime and size match the last migration.
+        With journal persistence the memory file is only a compaction snapshot,
+        older than the q_values rows written through since, so callers pass
+        load_q_values (returning the journal-replayed table) to import that
+        instead of the file.
+        """
+        migrated = {}
+        for source, path in (("tasks", tasks_path), ("q_values", memory_path)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
             
-            for task in tasks:
-                self.add_task(task['task_id'], task['name'], task.get('status', 'pending'))
-                if task.get('reward', 0) > 0:
-                    self.update_task_status(task['task_id'], task['status'], task['reward'])
+            fingerprint = f"{stat.st_mtime_ns}:{stat.st_size}"
+            meta_key = f"migrated:{source}"
+            if self.get_meta(meta_key) == fingerprint:
+                continue
             
-            # Migrate Q-table
-            with open("task_agent/data/agent_memory.json", 'r') as f:
-                q_table = json.load(f)
+            if source == "q_values" and load_q_values is not None:
+                data = load_q_values()
+            else:
+                with open(path, 'r') as f:
+                    data = json.load(f)
             
-            for task_id, q_value in q_table.items():
-                self.update_q_value(task_id, q_value)
-                
-        except FileNotFoundError:
-            pass
\ No newline at end of file
+            with self._transaction() as conn:
+                if source == "tasks":
+                    conn.executemany(UPSERT_TASK_SQL, _task_rows(data))
+                else:
+                    conn.executemany(UPSERT_Q_VALUE_SQL, ((str(task_id), q_value) for task_id, q_value in data.items()))
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (meta_key, fingerprint))
+            migrated[source] = len(data)
+            self.version += 1
+        
+        return migrated
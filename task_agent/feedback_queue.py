@@ -0,0 +1,149 @@
+import threading
+from collections import deque
+
+
+class QueueFull(RuntimeError):
+    """Raised by submit when max_pending rewards are already waiting"""
+
+
+class FeedbackQueue:
+    """Write-behind queue for rewards: requests enqueue, a background thread learns.
+
+    submit() only appends to an in-memory list and returns a sequence number.
+    The consumer wakes every ``interval`` seconds (or early, once half of
+    ``max_pending`` rewards are waiting), takes everything queued and applies
+    it with one RLModel.update_q_values call. That call coalesces repeated
+    rewards per task, applies them in arrival order and persists once, so a
+    burst of N rewards costs one disk write instead of N. Sequence numbers
+    are applied strictly in order; wait() gives read-your-writes. The queue
+    holds at most ``max_pending`` rewards: beyond that submit raises
+    QueueFull, so callers push back instead of buffering without bound.
+    """
+
+    def __init__(self, rl, interval=0.05, max_pending=1000, on_update=None, max_failures=100):
+        self.rl = rl
+        self.interval = interval
+        self.max_pending = max_pending
+        # Called with update_q_values' results, e.g. to mirror them into SQLite
+        self.on_update = on_update
+        self.submitted = 0  # Last sequence number handed out
+        self.applied = 0  # Every sequence number up to this one has been processed
+        self.flushes = 0
+        self.rewards_applied = 0
+        self.failures = deque(maxlen=max_failures)  # (first seq, last seq, error) of failed flushes
+        self._task_ids = []
+        self._rewards = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._applied_cond = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def submit(self, task_id, reward):
+        """Queue one reward; returns its sequence number"""
+        return self.submit_many([task_id], [reward])
+
+    def submit_many(self, task_ids, rewards):
+        """Queue rewards to be applied together; returns the last sequence number"""
+        with self._lock:
+            # An oversized batch is still let into an empty queue, or it could never be queued
+            if self._task_ids and len(self._task_ids) + len(task_ids) > self.max_pending:
+                raise QueueFull(f"Feedback queue full ({len(self._task_ids)} of {self.max_pending} pending)")
+            self._task_ids.extend(task_ids)
+            self._rewards.extend(rewards)
+            self.submitted += len(task_ids)
+            seq = self.submitted
+            pending = len(self._task_ids)
+        if pending >= self.max_pending // 2:
+            self._wake.set()
+        return seq
+
+    def flush(self):
+        """Apply everything queued so far; returns the number of rewards applied"""
+        with self._flush_lock:
+            with self._lock:
+                task_ids, rewards = self._task_ids, self._rewards
+                self._task_ids, self._rewards = [], []
+                last = self.submitted
+            if not task_ids:
+                return 0
+
+            first = last - len(task_ids) + 1
+            learnable = [self.rl.can_learn(task_id) for task_id in task_ids]
+            if not all(learnable):
+                # Fail only the rewards the model cannot apply, so they don't sink the batch
+                for offset, ok in enumerate(learnable):
+                    if not ok:
+                        self.failures.append((first + offset, first + offset, f"Cannot learn task {task_ids[offset]}"))
+                task_ids = [task_id for task_id, ok in zip(task_ids, learnable) if ok]
+                rewards = [reward for reward, ok in zip(rewards, learnable) if ok]
+
+            try:
+                results = self.rl.update_q_values(task_ids, rewards)
+                if self.on_update is not None:
+                    self.on_update(results)
+                self.rewards_applied += len(task_ids)
+            except Exception as e:
+                # Dropped rather than retried forever; status() reports these as failed
+                self.failures.append((first, last, str(e)))
+                print(f"Feedback flush failed for sequences {first}-{last}: {e}")
+            self.flushes += 1
+
+            with self._applied_cond:
+                self.applied = last
+                self._applied_cond.notify_all()
+            return len(task_ids)
+
+    def wait(self, seq, timeout=None):
+        """Block until seq has been processed; returns False on timeout"""
+        with self._applied_cond:
+            return self._applied_cond.wait_for(lambda: self.applied >= seq, timeout)
+
+    def status(self, seq):
+        """'applied', 'pending', 'failed', or 'unknown' for a sequence number"""
+        if seq < 1 or seq > self.submitted:
+            return "unknown"
+        if seq > self.applied:
+            return "pending"
+        for first, last, _ in self.failures:
+            if first <= seq <= last:
+                return "failed"
+        return "applied"
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="feedback-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Feedback flush failed: {e}")
+
+    def close(self, timeout=10.0):
+        """Stop the consumer and drain the queue, so no acknowledged feedback is lost"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._task_ids)
+        return {
+            "submitted": self.submitted,
+            "applied": self.applied,
+            "pending": pending,
+            "max_pending": self.max_pending,
+            "flushes": self.flushes,
+            "rewards_applied": self.rewards_applied,
+            "failed_flushes": len(self.failures),
+            "background": self._thread is not None and self._thread.is_alive()
+        }
@@ -0,0 +1,127 @@
+import os
+import threading
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ProviderHTTPClient:
+    """Shared keep-alive HTTP client for LLM provider traffic.
+
+    Wraps one requests.Session with a bounded urllib3 connection pool,
+    separate connect/read timeouts and a cap on concurrent requests, so
+    reasoning calls and health probes reuse TCP connections instead of
+    opening a new one each time.
+    """
+
+    def __init__(self, pool_size=10, max_concurrent=16, connect_timeout=2.0, read_timeout=30.0):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_concurrent = max_concurrent
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _timeout(self, timeout):
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, tuple):
+            return timeout
+        return (min(self.connect_timeout, timeout), timeout)
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.read_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise RuntimeError("Too many concurrent provider requests")
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def request(self, method, url, timeout=None, **kwargs):
+        """Send a request and read the full response"""
+        self._acquire()
+        try:
+            return self.session.request(method, url, timeout=self._timeout(timeout), **kwargs)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            self._release()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    @contextmanager
+    def stream(self, method, url, timeout=None, **kwargs):
+        """Send a request and hold its concurrency slot while the body streams"""
+        self._acquire()
+        try:
+            with self.session.request(method, url, timeout=self._timeout(timeout), stream=True, **kwargs) as response:
+                yield response
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            self._release()
+
+    def stats(self):
+        """Request counters and per-host connection pool usage"""
+        pools = {}
+        manager = self._adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is not None:
+                pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                    "connections_opened": pool.num_connections,
+                    "requests": pool.num_requests,
+                    "idle": sum(1 for conn in pool.pool.queue if conn is not None) if pool.pool is not None else 0
+                }
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "max_concurrent": self.max_concurrent,
+            "pools": pools
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """Get the process-wide provider HTTP client"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ProviderHTTPClient(
+                    pool_size=int(os.getenv("PROVIDER_HTTP_POOL_SIZE", "10")),
+                    max_concurrent=int(os.getenv("PROVIDER_HTTP_MAX_CONCURRENT", "16")),
+                    connect_timeout=float(os.getenv("PROVIDER_HTTP_CONNECT_TIMEOUT", "2.0")),
+                    read_timeout=float(os.getenv("PROVIDER_HTTP_READ_TIMEOUT", "30.0"))
+                )
+    return _client
@@ -0,0 +1,113 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+
+class QJournal:
+    """Append-only log of Q-value updates.
+
+    Each line records the absolute new Q-value for a task (``task_id<TAB>q``),
+    so replaying the journal over a snapshot is idempotent. Writes are flushed
+    on every append and fsynced once per ``sync_every`` entries or
+    ``sync_interval`` seconds, whichever comes first. A timer enforces the
+    interval when appends stop, so the tail of a burst is not left unsynced.
+    """
+
+    def __init__(self, path, sync_every=100, sync_interval=1.0):
+        self.path = Path(path)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.entries = 0
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._file = None
+        self._timer = None
+        self._lock = threading.RLock()
+
+    def replay(self, q_table):
+        """Apply all journaled updates to q_table, returning the number applied"""
+        applied = 0
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 2:
+                        continue  # torn write at the tail
+                    try:
+                        q_table[parts[0]] = float(parts[1])
+                    except ValueError:
+                        continue
+                    applied += 1
+        except FileNotFoundError:
+            pass
+        self.entries = applied
+        return applied
+
+    def append(self, task_key, q_value):
+        """Record a Q-value update"""
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a")
+            self._file.write(f"{task_key}\t{q_value!r}\n")
+            self._file.flush()
+            self.entries += 1
+            self._pending += 1
+            self._maybe_sync()
+
+    def append_many(self, updates):
+        """Record several (task_key, q_value) updates with a single flush"""
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a")
+            count = 0
+            for task_key, q_value in updates:
+                self._file.write(f"{task_key}\t{q_value!r}\n")
+                count += 1
+            self._file.flush()
+            self.entries += count
+            self._pending += count
+            self._maybe_sync()
+
+    def _maybe_sync(self):
+        """Sync now if a threshold is reached, otherwise make sure a timer will"""
+        if (self._pending >= self.sync_every
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+        elif self._timer is None:
+            self._timer = threading.Timer(self.sync_interval, self._timed_sync)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _timed_sync(self):
+        with self._lock:
+            self._timer = None
+            self.sync()
+
+    def sync(self):
+        """fsync pending entries to disk"""
+        with self._lock:
+            if self._file is not None and self._pending:
+                os.fsync(self._file.fileno())
+            self._pending = 0
+            self._last_sync = time.monotonic()
+
+    def reset(self):
+        """Truncate the journal once its entries are covered by a snapshot"""
+        with self._lock:
+            self.close()
+            with open(self.path, "w"):
+                pass
+            self.entries = 0
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._file is not None:
+                self.sync()
+                self._file.close()
+                self._file = None
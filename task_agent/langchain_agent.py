@@ -1,8 +1,14 @@
+import asyncio
 import os
 import json
-import requests
+import threading
 from pathlib import Path
 from task_agent.rl_model import RLModel
+from task_agent.reasoning_cache import ReasoningCache
+from task_agent.provider_health import ProviderHealth
+from task_agent.http_client import get_http_client
+from task_agent.model_registry import get_model_registry
+from task_agent.metrics import SUGGEST_STAGE, track_llm_call
 
 # Load environment variables
 def load_env():
@@ -13,66 +19,78 @@ def load_env():
                 line = line.strip()
                 if line and not line.startswith('#') and '=' in line:
                     key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
-
-load_env()
+                    # Drop inline comments: KEY=value  # note
+                    os.environ[key.strip()] = value.split(' #', 1)[0].strip()
 
 class LangChainTaskAgent:
-    def __init__(self):
-        self.rl = RLModel()
-        self.llm = self._init_llm()
-        self.llm_type = self._get_llm_type()
-        
-    def _init_llm(self):
-        """Initialize LLM with priority: Gemini > HuggingFace > Ollama"""
-        # 1. Try Gemini (primary)
-        gemini_key = os.getenv("GEMINI_API_KEY")
-        if gemini_key and gemini_key != "your_gemini_api_key_here":
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=gemini_key)
-                return genai.GenerativeModel("gemini-pro")
-            except ImportError:
-                print("Gemini library not installed")
-            except Exception as e:
-                print(f"Gemini initialization failed: {e}")
-        
-        # 2. Try HuggingFace (fallback)
-        hf_key = os.getenv("HUGGINGFACE_API_KEY")
-        if hf_key and hf_key != "your_huggingface_api_key_here":
+    def __init__(self, rl=None):
+        load_env()
+        self.rl = rl or RLModel()
+        # Provider clients are imported and built on first use
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        self.http = get_http_client()
+        self.health = ProviderHealth(
+            interval=float(os.getenv("PROVIDER_HEALTH_INTERVAL", "30")),
+            ollama_url=os.getenv("OLLAMA_URL", "http://localhost:11434")
+        )
+        self.health.start()
+        # Local pipelines live in the process-wide registry, shared with the
+        # Gemini fallback path and any other agent in this process
+        self.models = get_model_registry()
+        self.hf_model_id = os.getenv("HF_MODEL_ID", "microsoft/DialoGPT-medium")
+        if os.getenv("HF_WARM_MODELS", "false").lower() == "true" and self.health.is_available("huggingface"):
+            self.models.warm([(self.hf_model_id, "text-generation")])
+        self.reasoning_cache = ReasoningCache(
+            max_entries=int(os.getenv("REASONING_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("REASONING_CACHE_TTL", "3600")),
+            q_bucket=float(os.getenv("REASONING_CACHE_Q_BUCKET", "0.05")),
+            db_path=os.getenv("REASONING_CACHE_DB") or None
+        )
+        # Async path: total time allowed for LLM reasoning, and how long to
+        # wait on a provider before hedging to the next one
+        self.reasoning_budget = float(os.getenv("REASONING_BUDGET", "8.0"))
+        self.hedge_delay = float(os.getenv("REASONING_HEDGE_DELAY", "2.0"))
+    
+    @property
+    def llm_type(self):
+        """Highest-priority available provider: Gemini > HuggingFace > Ollama"""
+        available = self.health.available_providers()
+        return available[0] if available else "none"
+    
+    @property
+    def llm(self):
+        """Client for the active provider, built on first use (None if unavailable)"""
+        while self.llm_type != "none":
+            provider = self.llm_type
             try:
-                from langchain_community.llms import HuggingFacePipeline
-                return HuggingFacePipeline.from_model_id(
-                    model_id="microsoft/DialoGPT-medium",
-                    task="text-generation"
-                )
-            except ImportError:
-                print("HuggingFace library not installed")
+                return self._client(provider)
             except Exception as e:
-                print(f"HuggingFace initialization failed: {e}")
-        
-        # 3. Try Ollama (local fallback)
-        try:
-            response = requests.get("http://localhost:11434/api/tags", timeout=2)
-            if response.status_code == 200:
-                return "ollama"  # Ollama is available
-        except:
-            pass
-        
+                print(f"{provider} initialization failed: {e}")
+                self.health.mark_failed(provider, e)
         return None
     
-    def _get_llm_type(self):
-        """Get the type of LLM being used"""
-        if self.llm is None:
-            return "none"
-        elif isinstance(self.llm, str) and self.llm == "ollama":
-            return "ollama"
-        elif 'genai' in str(type(self.llm)) or 'GenerativeModel' in str(type(self.llm)):
-            return "gemini"
-        elif 'HuggingFace' in str(type(self.llm)):
-            return "huggingface"
-        else:
-            return "unknown"
+    def _client(self, provider):
+        """Get (or lazily build) the client for a provider"""
+        if provider == "huggingface":
+            # Not cached here, so registry eviction can actually free the weights
+            return self.models.get(self.hf_model_id, "text-generation")
+        client = self._clients.get(provider)
+        if client is None:
+            with self._clients_lock:
+                client = self._clients.get(provider)
+                if client is None:
+                    client = self._clients[provider] = self._build_client(provider)
+        return client
+    
+    def _build_client(self, provider):
+        if provider == "gemini":
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+            return genai.GenerativeModel("gemini-pro")
+        elif provider == "ollama":
+            return "ollama"  # Plain HTTP, nothing to build
+        raise ValueError(f"Unknown provider: {provider}")
     
     def suggest_task_with_reasoning(self, tasks):
         """Use RL + LangChain for task recommendation"""
@@ -94,60 +112,241 @@ class LangChainTaskAgent:
             "llm_used": self.llm_type
         }
     
+    async def asuggest_task_with_reasoning(self, tasks, rl=None):
+        """Async variant of suggest_task_with_reasoning with hedged LLM calls (rl: a tenant's model)"""
+        if not tasks:
+            return {"error": "No tasks found"}
+        
+        rl = rl or self.rl
+        with SUGGEST_STAGE.time(stage="rl_selection"):
+            chosen = await asyncio.to_thread(rl.choose_action, "state", tasks)
+        if not chosen:
+            return {"error": "No available tasks"}
+        
+        with SUGGEST_STAGE.time(stage="llm_reasoning"):
+            provider, reasoning = await self._ahedged_reasoning(chosen, rl=rl)
+        
+        return {
+            "task": chosen,
+            "reasoning": reasoning,
+            "q_value": rl.q_table.get(str(chosen['task_id']), 0),
+            "llm_used": provider
+        }
+    
+    def _prompt(self, task):
+        return f"Explain why task '{task['name']}' (ID: {task['task_id']}) is the best next choice in 2 sentences."
+    
+    def _provider_chain(self):
+        """Providers to try for a prompt, primary first"""
+        return self.health.available_providers()
+    
     def _get_reasoning(self, task):
-        """Generate reasoning using available LLM"""
-        prompt = f"Explain why task '{task['name']}' (ID: {task['task_id']}) is the best next choice in 2 sentences."
+        """Generate reasoning using available LLM, reusing cached explanations"""
+        if self.llm_type not in ("gemini", "huggingface", "ollama"):
+            return self._generate_reasoning(task)[0]
+        
+        q_val = self.rl.q_table.get(str(task['task_id']), 0)
+        key = self.reasoning_cache.make_key(self.llm_type, task, q_val)
+        reasoning = self.reasoning_cache.get(key)
+        if reasoning is None:
+            reasoning, ok = self._generate_reasoning(task)
+            # Failure messages are not cached so the next call retries the LLM
+            if ok:
+                self.reasoning_cache.put(key, reasoning)
+        return reasoning
+    
+    async def aget_reasoning(self, task, budget=None, hedge_delay=None, rl=None):
+        """Generate reasoning by racing providers within a latency budget.
+        
+        The primary provider is asked first. If it has not answered after
+        hedge_delay seconds, or fails, the same prompt goes to the next provider
+        and the first successful answer wins. When the budget runs out the
+        RL-only reasoning is returned instead.
+        """
+        return (await self._ahedged_reasoning(task, budget, hedge_delay, rl))[1]
+    
+    async def _ahedged_reasoning(self, task, budget=None, hedge_delay=None, rl=None):
+        """aget_reasoning as (provider that answered, reasoning); "none" for the RL-only fallback"""
+        rl = rl or self.rl
+        providers = self._provider_chain()
+        if not providers:
+            return "none", self._rl_reasoning(task, rl)
+        
+        q_val = rl.q_table.get(str(task['task_id']), 0)
+        reasoning = self.reasoning_cache.get(self.reasoning_cache.make_key(providers[0], task, q_val))
+        if reasoning is not None:
+            return providers[0], reasoning
+        
+        budget = self.reasoning_budget if budget is None else budget
+        hedge_delay = self.hedge_delay if hedge_delay is None else hedge_delay
+        prompt = self._prompt(task)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget
+        pending = set()
+        launched = 0
+        
+        def launch():
+            nonlocal launched
+            pending.add(asyncio.ensure_future(asyncio.to_thread(self._answer, providers[launched], prompt)))
+            launched += 1
+        
+        launch()
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                timeout = min(hedge_delay, remaining) if launched < len(providers) else remaining
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        # Cached under whichever provider won the race
+                        provider, reasoning = future.result()
+                        self.reasoning_cache.put(self.reasoning_cache.make_key(provider, task, q_val), reasoning)
+                        return provider, reasoning
+                # Timed out (hedge) or failed (fail over): ask the next provider
+                if launched < len(providers):
+                    launch()
+        finally:
+            # Threads cannot be interrupted; late answers are simply dropped
+            for future in pending:
+                future.cancel()
+        
+        return "none", self._rl_reasoning(task, rl)
+    
+    def _answer(self, provider, prompt):
+        """_call_provider tagged with the provider, for racing several"""
+        return provider, self._call_provider(provider, prompt)
+    
+    def _call_provider(self, provider, prompt):
+        """Call one provider synchronously; raises on failure or empty output"""
+        if provider == "gemini":
+            return self._call_gemini(prompt)
+        elif provider == "huggingface":
+            return self._call_huggingface(prompt)
+        elif provider == "ollama":
+            return self._call_ollama(prompt)
+        raise ValueError(f"Unknown provider: {provider}")
+    
+    def _call_gemini(self, prompt):
+        with track_llm_call("gemini"):
+            response = self._client("gemini").generate_content(prompt)
+            return response.text if hasattr(response, 'text') else str(response)
+    
+    def _call_huggingface(self, prompt):
+        with track_llm_call("huggingface"):
+            return self._client("huggingface")(prompt)
+    
+    def _call_ollama(self, prompt):
+        with track_llm_call("ollama"):
+            text = "".join(self._stream_ollama(prompt)).strip()
+            if not text:
+                raise RuntimeError("Ollama response empty")
+            return text
+    
+    def _stream_ollama(self, prompt):
+        """Yield Ollama tokens as the server generates them"""
+        with self.http.stream("POST", f"{self.health.ollama_url}/api/generate", 
+                              json={"model": "llama3", "prompt": prompt}, 
+                              timeout=10) as response:
+            if response.status_code != 200:
+                raise RuntimeError("Ollama server error")
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        continue
+                    if data.get("response"):
+                        yield data["response"]
+    
+    def _stream_provider(self, provider, prompt):
+        """Yield reasoning chunks from a provider's streaming API"""
+        if provider == "ollama":
+            yield from self._stream_ollama(prompt)
+        elif provider == "gemini":
+            for chunk in self._client("gemini").generate_content(prompt, stream=True):
+                text = getattr(chunk, 'text', '')
+                if text:
+                    yield text
+        else:
+            # HuggingFace pipelines have no token stream; send the full answer
+            yield self._call_provider(provider, prompt)
+    
+    def stream_reasoning(self, task, rl=None):
+        """Yield reasoning text for a task as the LLM produces it.
+        
+        Cached explanations are sent in one piece. If the provider fails before
+        producing anything, the RL-only reasoning is sent instead.
+        """
+        rl = rl or self.rl
+        provider = self.llm_type
+        if provider == "none":
+            yield self._rl_reasoning(task, rl)
+            return
+        
+        q_val = rl.q_table.get(str(task['task_id']), 0)
+        key = self.reasoning_cache.make_key(provider, task, q_val)
+        reasoning = self.reasoning_cache.get(key)
+        if reasoning is not None:
+            yield reasoning
+            return
+        
+        chunks = []
+        try:
+            for chunk in self._stream_provider(provider, self._prompt(task)):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            if not chunks:
+                yield self._rl_reasoning(task, rl)
+            else:
+                print(f"{provider} stream interrupted: {e}")
+            return
+        
+        reasoning = "".join(chunks).strip()
+        if reasoning:
+            self.reasoning_cache.put(key, reasoning)
+        else:
+            yield self._rl_reasoning(task, rl)
+    
+    def _generate_reasoning(self, task):
+        """Call the available LLM; returns (reasoning, succeeded)"""
+        prompt = self._prompt(task)
+        llm_type = self.llm_type
         
         # Try Gemini first
-        if self.llm_type == "gemini":
+        if llm_type == "gemini":
             try:
-                response = self.llm.generate_content(prompt)
-                return response.text if hasattr(response, 'text') else str(response)
+                return self._call_gemini(prompt), True
             except Exception as e:
                 # Fallback to HuggingFace if Gemini fails
-                if os.getenv("HUGGINGFACE_API_KEY"):
+                if self.health.is_available("huggingface"):
                     try:
-                        from langchain_community.llms import HuggingFacePipeline
-                        hf_llm = HuggingFacePipeline.from_model_id(
-                            model_id="microsoft/DialoGPT-medium",
-                            task="text-generation"
-                        )
-                        return hf_llm(prompt)
+                        return self._call_huggingface(prompt), True
                     except:
                         pass
-                return f"Gemini failed, HF unavailable: {str(e)[:50]}..."
+                return f"Gemini failed, HF unavailable: {str(e)[:50]}...", False
         
         # Try HuggingFace
-        elif self.llm_type == "huggingface":
+        elif llm_type == "huggingface":
             try:
-                return self.llm(prompt)
+                return self._call_huggingface(prompt), True
             except Exception as e:
-                return f"HuggingFace failed: {str(e)}"
+                return f"HuggingFace failed: {str(e)}", False
         
         # Try Ollama
-        elif self.llm_type == "ollama":
+        elif llm_type == "ollama":
             try:
-                response = requests.post("http://localhost:11434/api/generate", 
-                                       json={"model": "llama3", "prompt": prompt}, 
-                                       timeout=10)
-                if response.status_code == 200:
-                    text = ""
-                    for line in response.iter_lines(decode_unicode=True):
-                        if line:
-                            try:
-                                data = json.loads(line)
-                                if "response" in data:
-                                    text += data["response"]
-                            except:
-                                continue
-                    return text.strip() or "Ollama response empty"
-                else:
-                    return "Ollama server error"
+                return self._call_ollama(prompt), True
             except Exception as e:
-                return f"Ollama failed: {str(e)}"
+                return f"Ollama failed: {str(e)}", False
         
-        # Fallback to RL-only reasoning
-        q_val = self.rl.q_table.get(str(task['task_id']), 0)
+        return self._rl_reasoning(task), True
+    
+    def _rl_reasoning(self, task, rl=None):
+        """Fallback to RL-only reasoning"""
+        q_val = (rl or self.rl).q_table.get(str(task['task_id']), 0)
         priority = task.get('priority', 'medium')
         status = task.get('status', 'unknown')
-        return f"Task '{task['name']}' selected by RL agent (Q-value: {q_val:.3f}). Priority: {priority}, Status: {status}. This task shows good learning potential based on historical performance."
\ No newline at end of file
+        return f"Task '{task['name']}' selected by RL agent (Q-value: {q_val:.3f}). Priority: {priority}, Status: {status}. This task shows good learning potential based on historical performance."
@@ -0,0 +1,250 @@
+import json
+import os
+import re
+import zlib
+
+import numpy as np
+
+PRIORITY_FEATURES = ("low", "medium", "high", "critical")
+COMPLEXITY_FEATURES = ("low", "medium", "high")
+STATUS_FEATURES = ("pending", "in_progress")
+
+# Feature layout: bias | priority | complexity | status (+ "other") | hashed name tokens
+PRIORITY_OFFSET = 1
+COMPLEXITY_OFFSET = PRIORITY_OFFSET + len(PRIORITY_FEATURES)
+STATUS_OFFSET = COMPLEXITY_OFFSET + len(COMPLEXITY_FEATURES)
+TOKEN_OFFSET = STATUS_OFFSET + len(STATUS_FEATURES) + 1
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class LinearPolicy:
+    """Linear value model over task features, a drop-in for the Q-table.
+
+    A task's value is ``w · x`` where x has a bias, one-hot priority,
+    complexity and status, and hashed name tokens, so memory is fixed by the
+    number of features rather than the number of tasks, and new tasks start
+    from what similar tasks have learned. Scoring a task list is one sparse
+    matrix-vector product.
+
+    Follows the dict interface RLModel uses for the Q-table: reading a task's
+    value predicts it, and assigning a target value takes a normalized SGD
+    step towards it (batched through update()). Tasks are identified through
+    the last task list passed to sync_tasks(), or through ``lookup``
+    (task_id -> task dict) for tasks outside it.
+    """
+
+    def __init__(self, hash_buckets=1024, learning_rate=1.0, weights=None, lookup=None):
+        self.hash_buckets = hash_buckets
+        self.learning_rate = learning_rate
+        self.lookup = lookup
+        self.n_features = TOKEN_OFFSET + hash_buckets
+        self.weights = np.zeros(self.n_features) if weights is None else np.asarray(weights, dtype=np.float64)
+        if self.weights.shape != (self.n_features,):
+            raise ValueError(f"Expected {self.n_features} weights, got {self.weights.shape}")
+        self.updates = 0
+
+        # Sparse (CSR-style) feature matrix of the last synced task list
+        self._tasks = None
+        self._keys = []
+        self._positions = {}
+        self._rows = np.empty(0, dtype=np.intp)
+        self._cols = np.empty(0, dtype=np.intp)
+        self._vals = np.empty(0)
+        self._indptr = np.zeros(1, dtype=np.intp)
+        self._available = np.empty(0, dtype=bool)
+
+    # Features
+
+    def features(self, task):
+        """Active feature indices and values for one task"""
+        cols = [0]
+        priority = task.get('priority')
+        if priority in PRIORITY_FEATURES:
+            cols.append(PRIORITY_OFFSET + PRIORITY_FEATURES.index(priority))
+        complexity = task.get('complexity')
+        if complexity in COMPLEXITY_FEATURES:
+            cols.append(COMPLEXITY_OFFSET + COMPLEXITY_FEATURES.index(complexity))
+        status = task.get('status', 'pending')
+        cols.append(STATUS_OFFSET + (STATUS_FEATURES.index(status) if status in STATUS_FEATURES else len(STATUS_FEATURES)))
+        vals = [1.0] * len(cols)
+
+        # crc32 rather than hash(): stable across processes and restarts
+        tokens = set(TOKEN_PATTERN.findall(str(task.get('name', '')).lower()))
+        if tokens:
+            weight = 1.0 / np.sqrt(len(tokens))
+            for token in sorted(tokens):
+                cols.append(TOKEN_OFFSET + zlib.crc32(token.encode()) % self.hash_buckets)
+                vals.append(weight)
+        return cols, vals
+
+    def sync_tasks(self, tasks):
+        """Build the feature matrix for a task list (skipped if already synced)"""
+        if tasks is self._tasks and len(tasks) == len(self._keys):
+            return
+        cols, vals, lengths = [], [], []
+        for task in tasks:
+            task_cols, task_vals = self.features(task)
+            cols.extend(task_cols)
+            vals.extend(task_vals)
+            lengths.append(len(task_cols))
+        lengths = np.asarray(lengths, dtype=np.intp)
+
+        self._keys = [str(task['task_id']) for task in tasks]
+        self._positions = dict(zip(self._keys, range(len(self._keys))))
+        self._rows = np.repeat(np.arange(len(tasks)), lengths)
+        self._cols = np.asarray(cols, dtype=np.intp)
+        self._vals = np.asarray(vals, dtype=np.float64)
+        self._indptr = np.concatenate(([0], np.cumsum(lengths)))
+        self._available = np.fromiter((task.get('status') != 'done' for task in tasks),
+                                      dtype=bool, count=len(tasks))
+        self._tasks = tasks
+
+    def set_available(self, task_key, available):
+        """Update the available mask in place after a task status change"""
+        position = self._positions.get(task_key)
+        if position is not None:
+            self._available[position] = available
+
+    def _task_features(self, task_key):
+        position = self._positions.get(task_key)
+        if position is not None:
+            start, end = self._indptr[position], self._indptr[position + 1]
+            return self._cols[start:end], self._vals[start:end]
+        task = self.lookup(task_key) if self.lookup is not None else None
+        if task is None:
+            return None
+        cols, vals = self.features(task)
+        return np.asarray(cols, dtype=np.intp), np.asarray(vals)
+
+    # Scoring
+
+    def scores(self):
+        """Predicted value of every synced task: X @ w"""
+        return np.bincount(self._rows, weights=self.weights[self._cols] * self._vals, minlength=len(self._keys))
+
+    def predict(self, task):
+        cols, vals = self.features(task)
+        return float(self.weights[cols] @ np.asarray(vals))
+
+    def choose(self, tasks, epsilon=0.2):
+        """Epsilon-greedy choice over the available tasks"""
+        self.sync_tasks(tasks)
+        candidates = np.flatnonzero(self._available)
+        if candidates.size == 0:
+            return None
+
+        if np.random.rand() < epsilon:
+            return tasks[np.random.choice(candidates)]
+
+        # argmax returns the first maximum, matching list order on ties
+        return tasks[candidates[np.argmax(self.scores()[candidates])]]
+
+    def top_k(self, tasks, k):
+        """Return the k available tasks with the highest values as (task, value) pairs"""
+        self.sync_tasks(tasks)
+        candidates = np.flatnonzero(self._available)
+        if candidates.size == 0 or k <= 0:
+            return []
+
+        values = self.scores()[candidates]
+        if k < candidates.size:
+            best = np.argpartition(-values, k - 1)[:k]
+            best = best[np.lexsort((candidates[best], -values[best]))]
+        else:
+            best = np.argsort(-values, kind='stable')
+        return [(tasks[candidates[i]], float(values[i])) for i in best]
+
+    # Learning
+
+    def update(self, items):
+        """Move predictions towards (task_key, target) pairs with one batched SGD step.
+
+        Each task contributes a normalized (NLMS) gradient, so a single-task
+        update with learning_rate=1.0 lands exactly on its target; a batch
+        applies the mean of its tasks' steps.
+        """
+        cols, vals, errors, rows = [], [], [], []
+        for task_key, target in items:
+            features = self._task_features(str(task_key))
+            if features is None:
+                raise KeyError(f"No features for task {task_key}: not in the synced task list")
+            task_cols, task_vals = features
+            error = (target - self.weights[task_cols] @ task_vals) / (task_vals @ task_vals)
+            cols.append(task_cols)
+            vals.append(task_vals)
+            errors.append(error)
+            rows.append(np.full(len(task_cols), len(errors) - 1))
+        if not errors:
+            return
+
+        cols = np.concatenate(cols)
+        gradient = np.bincount(cols, weights=np.concatenate(vals) * np.asarray(errors)[np.concatenate(rows)],
+                               minlength=self.n_features)
+        self.weights += self.learning_rate * gradient / len(errors)
+        self.updates += len(errors)
+
+    # Dict interface used by RLModel
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, task_key):
+        return self._task_features(task_key) is not None
+
+    def get(self, task_key, default=None):
+        features = self._task_features(task_key)
+        if features is None:
+            return default
+        cols, vals = features
+        return float(self.weights[cols] @ vals)
+
+    def __getitem__(self, task_key):
+        value = self.get(task_key)
+        if value is None:
+            raise KeyError(task_key)
+        return value
+
+    def __setitem__(self, task_key, value):
+        self.update([(task_key, value)])
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def keys(self):
+        return list(self._keys)
+
+    def values(self):
+        return self.scores()
+
+    def items(self):
+        return zip(self._keys, self.scores().tolist())
+
+    def to_dict(self):
+        """Predicted values of the synced tasks"""
+        return dict(self.items())
+
+    # Persistence
+
+    def save(self, path):
+        """Write weights atomically as JSON (size is fixed by the feature count)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "hash_buckets": self.hash_buckets,
+                "updates": self.updates,
+                "weights": self.weights.tolist()
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, hash_buckets=1024, **kwargs):
+        """Load saved weights, or start from zero weights if there are none"""
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls(hash_buckets=hash_buckets, **kwargs)
+        policy = cls(hash_buckets=data["hash_buckets"], weights=data["weights"], **kwargs)
+        policy.updates = data.get("updates", 0)
+        return policy
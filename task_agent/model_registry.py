@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def load_huggingface_pipeline(model_id, task):
+    """Default loader: a LangChain HuggingFacePipeline"""
+    from langchain_community.llms import HuggingFacePipeline
+    return HuggingFacePipeline.from_model_id(model_id=model_id, task=task)
+
+
+def estimate_model_bytes(model):
+    """Best-effort parameter memory of a loaded pipeline (0 if unknown)"""
+    torch_model = getattr(getattr(model, "pipeline", None), "model", None)
+    if torch_model is None or not hasattr(torch_model, "parameters"):
+        return 0
+    try:
+        return sum(p.numel() * p.element_size() for p in torch_model.parameters())
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded local model pipelines.
+
+    Each (model_id, task) pair is loaded at most once and shared by every
+    caller. Models idle for longer than ``idle_timeout`` seconds, or the least
+    recently used ones beyond ``memory_budget_mb``, are dropped so their
+    weights can be garbage collected.
+    """
+
+    def __init__(self, memory_budget_mb=0, idle_timeout=0, loader=load_huggingface_pipeline):
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.idle_timeout = idle_timeout
+        self.loader = loader
+        self._models = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def get(self, model_id, task="text-generation"):
+        """Get a loaded model, loading it on first use"""
+        key = (model_id, task)
+        self.evict_idle()
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                entry["last_used"] = time.time()
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry["model"]
+            # One loader per key; concurrent callers wait for it
+            load_lock = self._loading.setdefault(key, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    entry["last_used"] = time.time()
+                    self.hits += 1
+                    return entry["model"]
+
+            model = self.loader(model_id, task)
+            now = time.time()
+            with self._lock:
+                self._models[key] = {
+                    "model": model,
+                    "bytes": estimate_model_bytes(model),
+                    "loaded_at": now,
+                    "last_used": now
+                }
+                self.loads += 1
+                self._loading.pop(key, None)
+                self._enforce_budget(keep=key)
+            return model
+
+    def warm(self, specs):
+        """Load (model_id, task) pairs on a background thread"""
+        def run():
+            for model_id, task in specs:
+                try:
+                    self.get(model_id, task)
+                except Exception as e:
+                    print(f"Model warm-up failed for {model_id}: {e}")
+
+        thread = threading.Thread(target=run, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def evict_idle(self):
+        """Drop models unused for longer than idle_timeout"""
+        if not self.idle_timeout:
+            return
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            for key in [key for key, entry in self._models.items() if entry["last_used"] < cutoff]:
+                del self._models[key]
+                self.evictions += 1
+
+    def _enforce_budget(self, keep):
+        if not self.memory_budget:
+            return
+        total = sum(entry["bytes"] for entry in self._models.values())
+        for key in list(self._models):
+            if total <= self.memory_budget:
+                break
+            if key == keep:
+                continue
+            total -= self._models.pop(key)["bytes"]
+            self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": [
+                    {"model_id": model_id, "task": task, "mb": round(entry["bytes"] / 1024 / 1024, 1),
+                     "idle_seconds": round(time.time() - entry["last_used"], 1)}
+                    for (model_id, task), entry in self._models.items()
+                ],
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+                "memory_budget_mb": self.memory_budget // (1024 * 1024)
+            }
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry():
+    """Get the process-wide model registry"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry(
+                    memory_budget_mb=int(os.getenv("MODEL_MEMORY_BUDGET_MB", "0")),
+                    idle_timeout=float(os.getenv("MODEL_IDLE_TIMEOUT", "0"))
+                )
+    return _registry
@@ -0,0 +1,104 @@
+import importlib.util
+import os
+import threading
+import time
+
+from task_agent.http_client import get_http_client
+
+# Priority order: Gemini > HuggingFace > Ollama
+PROVIDERS = ("gemini", "huggingface", "ollama")
+
+PLACEHOLDER_KEYS = {
+    "gemini": ("GEMINI_API_KEY", "your_gemini_api_key_here"),
+    "huggingface": ("HUGGINGFACE_API_KEY", "your_huggingface_api_key_here"),
+}
+
+# Checked with find_spec so probing never imports the (slow) libraries
+PROVIDER_MODULES = {
+    "gemini": "google.generativeai",
+    "huggingface": "langchain_community",
+}
+
+
+def is_configured(provider):
+    """Whether an API-key provider has a real key set"""
+    env_var, placeholder = PLACEHOLDER_KEYS[provider]
+    key = os.getenv(env_var)
+    return bool(key) and key != placeholder
+
+
+def _module_installed(name):
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class ProviderHealth:
+    """Caches LLM provider availability, refreshed by a background thread.
+
+    Key/library checks are cheap and run inline on start(); the Ollama HTTP
+    probe only ever runs on the background thread, so callers never block.
+    """
+
+    def __init__(self, interval=30.0, ollama_url="http://localhost:11434"):
+        self.interval = interval
+        self.ollama_url = ollama_url
+        self._status = {
+            provider: {"available": False, "checked_at": None, "error": "not probed yet"}
+            for provider in PROVIDERS
+        }
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Probe local providers now and start the background prober"""
+        for provider in ("gemini", "huggingface"):
+            self._status[provider] = self._probe(provider)
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="provider-health", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            self.probe_all()
+            if self.interval <= 0 or self._stop.wait(self.interval):
+                return
+
+    def probe_all(self):
+        """Refresh every provider's status"""
+        for provider in PROVIDERS:
+            self._status[provider] = self._probe(provider)
+
+    def _probe(self, provider):
+        error = None
+        if provider in PLACEHOLDER_KEYS and not is_configured(provider):
+            error = "API key not set"
+        elif provider in PROVIDER_MODULES and not _module_installed(PROVIDER_MODULES[provider]):
+            error = f"{PROVIDER_MODULES[provider]} not installed"
+        elif provider == "ollama":
+            try:
+                response = get_http_client().get(f"{self.ollama_url}/api/tags", timeout=2)
+                if response.status_code != 200:
+                    error = f"HTTP {response.status_code}"
+            except Exception as e:
+                error = str(e)
+        return {"available": error is None, "checked_at": time.time(), "error": error}
+
+    def mark_failed(self, provider, error):
+        """Take a provider out of rotation until the next probe"""
+        self._status[provider] = {"available": False, "checked_at": time.time(), "error": str(error)}
+
+    def is_available(self, provider):
+        return self._status[provider]["available"]
+
+    def available_providers(self):
+        """Available providers in priority order"""
+        return [provider for provider in PROVIDERS if self._status[provider]["available"]]
+
+    def status(self):
+        return {provider: dict(status) for provider, status in self._status.items()}
@@ -0,0 +1,116 @@
+import threading
+
+import numpy as np
+
+
+def _merge(best, keys, old, new):
+    """Fold a batch of changes into a (value, key) maximum; None means rescan.
+
+    Only a drop of the current maximum's own value needs a rescan, and not
+    even then if another task in the batch reaches at least the old maximum.
+    """
+    if best is None:
+        return None
+    value, best_key = best
+    i = int(np.argmax(new))
+    candidate = (float(new[i]), keys[i])
+    try:
+        position = keys.index(best_key)
+    except ValueError:
+        position = -1
+    if position >= 0 and new[position] < old[position]:
+        return candidate if candidate[0] >= value else None
+    return candidate if candidate[0] > value else best
+
+
+def table_arrays(q_table):
+    """(keys list, float64 values array) of any Q-table backend, in matching order"""
+    values = q_table.values()
+    if not isinstance(values, np.ndarray):
+        values = np.fromiter(values, dtype=np.float64, count=len(q_table))
+    keys = q_table.keys()
+    return keys if isinstance(keys, list) else list(keys), values
+
+
+def scan(q_table):
+    """Full-table sum, (max, key) and (min, key); extremes are None when empty"""
+    keys, values = table_arrays(q_table)
+    if not len(values):
+        return 0.0, None, None
+    hi, lo = int(np.argmax(values)), int(np.argmin(values))
+    return float(values.sum()), (float(values[hi]), keys[hi]), (float(values[lo]), keys[lo])
+
+
+class QStatistics:
+    """Running sum, max and min of a Q-table, maintained on every update.
+
+    The entry count is the table's own length. Sum and extremes are updated
+    in O(1) per changed task; when the task holding the max (or min) moves
+    inwards, that extreme is marked stale and recomputed by one scan on the
+    next summary() instead of on every update. Everything starts stale, so a
+    freshly loaded table is scanned once, on first use.
+    """
+
+    def __init__(self):
+        self._total = None
+        self._max = None  # (value, task_key)
+        self._min = None  # (-value, task_key), so both use the max logic
+        self._lock = threading.Lock()
+        self.scans = 0
+
+    def update(self, task_key, old_q, new_q):
+        """Record one change (old_q is 0.0 for a new task, matching the Q-table default)"""
+        with self._lock:
+            if self._total is not None:
+                self._total += new_q - old_q
+            if self._max is not None:
+                if new_q > self._max[0]:
+                    self._max = (new_q, task_key)
+                elif task_key == self._max[1] and new_q < old_q:
+                    self._max = None
+            if self._min is not None:
+                if -new_q > self._min[0]:
+                    self._min = (-new_q, task_key)
+                elif task_key == self._min[1] and new_q > old_q:
+                    self._min = None
+
+    def update_many(self, task_keys, old_q, new_q):
+        """Record a batch of changes to distinct tasks (NumPy arrays aligned with task_keys)"""
+        if not task_keys:
+            return
+        with self._lock:
+            if self._total is not None:
+                self._total += float(new_q.sum() - old_q.sum())
+            self._max = _merge(self._max, task_keys, old_q, new_q)
+            self._min = _merge(self._min, task_keys, -old_q, -new_q)
+
+    def invalidate(self):
+        """Forget everything, e.g. after the table was replaced or edited directly"""
+        with self._lock:
+            self._total = self._max = self._min = None
+
+    def summary(self, q_table):
+        """Statistics in the get_task_statistics format; scans the table only if something is stale"""
+        count = len(q_table)
+        if not count:
+            return {
+                "total_tasks": 0,
+                "avg_q_value": 0.0,
+                "max_q_value": 0.0,
+                "min_q_value": 0.0,
+                "best_task_id": None
+            }
+
+        with self._lock:
+            if self._total is None or self._max is None or self._min is None:
+                # Exact sum on every scan also discards accumulated rounding drift
+                self._total, self._max, (low, low_key) = scan(q_table)
+                self._min = (-low, low_key)
+                self.scans += 1
+            return {
+                "total_tasks": count,
+                "avg_q_value": self._total / count,
+                "max_q_value": self._max[0],
+                "min_q_value": -self._min[0],
+                "best_task_id": self._max[1]
+            }
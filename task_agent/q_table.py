@@ -0,0 +1,164 @@
+import numpy as np
+
+
+class ArrayQTable:
+    """Q-table stored in contiguous NumPy arrays with a task ID -> slot index.
+
+    Behaves like the plain ``{task_id: q_value}`` dict used by RLModel, but
+    selection over a task list is done with vectorized mask/argmax operations
+    instead of a Python loop over every task.
+    """
+
+    def __init__(self, data=None, capacity=1024):
+        self._slots = {}
+        self._keys = []
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._present = np.zeros(capacity, dtype=bool)
+        self._count = 0
+
+        # Task list the available mask was last built from
+        self._tasks = None
+        self._order = np.empty(0, dtype=np.intp)
+        self._available = np.empty(0, dtype=bool)
+        self._positions = {}
+
+        if data:
+            for key, value in data.items():
+                self[key] = value
+
+    # Slot management
+
+    def slot(self, task_key):
+        """Get (or allocate) the array slot for a task key"""
+        slot = self._slots.get(task_key)
+        if slot is None:
+            slot = len(self._keys)
+            if slot == len(self._values):
+                self._grow(2 * slot)
+            self._slots[task_key] = slot
+            self._keys.append(task_key)
+        return slot
+
+    def _grow(self, capacity):
+        values = np.zeros(capacity, dtype=np.float64)
+        values[:len(self._values)] = self._values
+        present = np.zeros(capacity, dtype=bool)
+        present[:len(self._present)] = self._present
+        self._values = values
+        self._present = present
+
+    # Dict interface
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, task_key):
+        slot = self._slots.get(task_key)
+        return slot is not None and bool(self._present[slot])
+
+    def __getitem__(self, task_key):
+        slot = self._slots.get(task_key)
+        if slot is None or not self._present[slot]:
+            raise KeyError(task_key)
+        return float(self._values[slot])
+
+    def __setitem__(self, task_key, value):
+        slot = self.slot(task_key)
+        self._values[slot] = value
+        if not self._present[slot]:
+            self._present[slot] = True
+            self._count += 1
+
+    def __delitem__(self, task_key):
+        slot = self._slots.get(task_key)
+        if slot is None or not self._present[slot]:
+            raise KeyError(task_key)
+        self._values[slot] = 0.0
+        self._present[slot] = False
+        self._count -= 1
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def get(self, task_key, default=None):
+        slot = self._slots.get(task_key)
+        if slot is None or not self._present[slot]:
+            return default
+        return float(self._values[slot])
+
+    def get_many(self, task_keys):
+        """Vectorized lookup, returning 0.0 for unknown keys"""
+        slots = np.fromiter((self.slot(key) for key in task_keys), dtype=np.intp, count=len(task_keys))
+        return self._values[slots].copy()
+
+    def set_many(self, task_keys, values):
+        """Vectorized assignment"""
+        slots = np.fromiter((self.slot(key) for key in task_keys), dtype=np.intp, count=len(task_keys))
+        self._values[slots] = values
+        self._count += int(np.count_nonzero(~self._present[slots]))
+        self._present[slots] = True
+
+    def keys(self):
+        return [self._keys[slot] for slot in self._present_slots()]
+
+    def values(self):
+        return self._values[self._present_slots()]
+
+    def items(self):
+        slots = self._present_slots()
+        return zip([self._keys[slot] for slot in slots], self._values[slots].tolist())
+
+    def to_dict(self):
+        """Export as a plain dict (for JSON persistence and API responses)"""
+        return dict(self.items())
+
+    def _present_slots(self):
+        return np.flatnonzero(self._present[:len(self._keys)])
+
+    # Vectorized selection
+
+    def sync_tasks(self, tasks):
+        """Build the available mask for a task list (skipped if already synced)"""
+        if tasks is self._tasks and len(tasks) == len(self._order):
+            return
+        keys = [str(task['task_id']) for task in tasks]
+        self._order = np.fromiter((self.slot(key) for key in keys), dtype=np.intp, count=len(keys))
+        self._available = np.fromiter((task.get('status') != 'done' for task in tasks),
+                                      dtype=bool, count=len(tasks))
+        self._positions = dict(zip(keys, range(len(keys))))
+        self._tasks = tasks
+
+    def set_available(self, task_key, available):
+        """Update the available mask in place after a task status change"""
+        position = self._positions.get(task_key)
+        if position is not None:
+            self._available[position] = available
+
+    def choose(self, tasks, epsilon=0.2):
+        """Epsilon-greedy choice over the available tasks"""
+        self.sync_tasks(tasks)
+        candidates = np.flatnonzero(self._available)
+        if candidates.size == 0:
+            return None
+
+        if np.random.rand() < epsilon:
+            return tasks[np.random.choice(candidates)]
+
+        # argmax returns the first maximum, matching list order on ties
+        q_values = self._values[self._order[candidates]]
+        return tasks[candidates[np.argmax(q_values)]]
+
+    def top_k(self, tasks, k):
+        """Return the k available tasks with the highest Q-values as (task, q) pairs"""
+        self.sync_tasks(tasks)
+        candidates = np.flatnonzero(self._available)
+        if candidates.size == 0 or k <= 0:
+            return []
+
+        q_values = self._values[self._order[candidates]]
+        if k < candidates.size:
+            best = np.argpartition(-q_values, k - 1)[:k]
+            best = best[np.lexsort((candidates[best], -q_values[best]))]
+        else:
+            best = np.argsort(-q_values, kind='stable')
+        return [(tasks[candidates[i]], float(q_values[i])) for i in best]
@@ -0,0 +1,151 @@
+import heapq
+import threading
+
+import numpy as np
+
+
+class RankingIndex:
+    """Max-heap of available tasks keyed by Q-value, maintained incrementally.
+
+    Q-value changes push a new heap entry and bump the task's version; stale
+    entries are skipped (and dropped) when popped. top_k, paginated ranks and
+    next-best lookups therefore cost O((offset + k) log n) instead of a full
+    scan and sort. Ties keep task-list order, like RLModel.choose_action.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.source = None
+        self._source_len = 0
+        self._source_tasks = {}
+        self._heap = []
+        self._current = {}  # task_key -> (q_value, version)
+        self._seq = {}  # task_key -> tie-break order
+        self._keys = []  # available keys, for O(1) random choice
+        self._key_pos = {}
+        self._version = 0
+
+    def __len__(self):
+        return len(self._current)
+
+    def sync(self, tasks, q_table):
+        """Rebuild from a task list unless it is the one already indexed"""
+        if tasks is self.source and len(tasks) == self._source_len:
+            return
+        with self._lock:
+            if tasks is self.source and len(tasks) == self._source_len:
+                return
+            self.rebuild(tasks, q_table)
+
+    def rebuild(self, tasks, q_table):
+        """Index every available task in O(n)"""
+        with self._lock:
+            self._source_tasks = {}
+            self._current = {}
+            self._seq = {}
+            self._keys = []
+            self._key_pos = {}
+            heap = []
+            for position, task in enumerate(tasks):
+                key = str(task['task_id'])
+                self._source_tasks[key] = task
+                self._seq[key] = position
+                if task.get('status') != 'done':
+                    self._version += 1
+                    q_value = q_table.get(key, 0.0)
+                    self._current[key] = (q_value, self._version)
+                    self._add_key(key)
+                    heap.append((-q_value, position, self._version, key))
+            heapq.heapify(heap)
+            self._heap = heap
+            self.source = tasks
+            self._source_len = len(tasks)
+
+    def update(self, task_key, q_value):
+        """Record a new Q-value for an available task"""
+        with self._lock:
+            if task_key not in self._current:
+                return
+            self._push(task_key, q_value)
+            self._maybe_compact()
+
+    def set_available(self, task_key, available, q_value=0.0):
+        """Add or remove a task after a status change"""
+        with self._lock:
+            if not available:
+                if self._current.pop(task_key, None) is not None:
+                    self._remove_key(task_key)
+                    self._maybe_compact()
+            elif task_key in self._source_tasks and task_key not in self._current:
+                self._add_key(task_key)
+                self._push(task_key, q_value)
+
+    def top_k(self, k=10, offset=0):
+        """Tasks ranked offset+1 .. offset+k as (task, q_value) pairs"""
+        with self._lock:
+            popped = self._pop_valid(offset + k)
+            for item in popped:
+                heapq.heappush(self._heap, item)
+            return [(self._source_tasks[item[3]], -item[0]) for item in popped[offset:]]
+
+    def next_best(self, exclude=()):
+        """Best available task not in exclude, as (task, q_value), or None"""
+        with self._lock:
+            popped = []
+            result = None
+            while True:
+                batch = self._pop_valid(1)
+                if not batch:
+                    break
+                popped.extend(batch)
+                if batch[0][3] not in exclude:
+                    result = (self._source_tasks[batch[0][3]], -batch[0][0])
+                    break
+            for item in popped:
+                heapq.heappush(self._heap, item)
+            return result
+
+    def choose(self, epsilon=0.2):
+        """Epsilon-greedy choice over the indexed tasks"""
+        if not self._keys:
+            return None
+        if np.random.rand() < epsilon:
+            with self._lock:
+                if not self._keys:
+                    return None
+                return self._source_tasks[self._keys[np.random.randint(len(self._keys))]]
+        best = self.next_best()
+        return best[0] if best else None
+
+    def _push(self, task_key, q_value):
+        self._version += 1
+        self._current[task_key] = (q_value, self._version)
+        heapq.heappush(self._heap, (-q_value, self._seq[task_key], self._version, task_key))
+
+    def _pop_valid(self, count):
+        """Pop up to count live entries, discarding stale ones"""
+        popped = []
+        while self._heap and len(popped) < count:
+            item = heapq.heappop(self._heap)
+            current = self._current.get(item[3])
+            if current is not None and current[1] == item[2]:
+                popped.append(item)
+        return popped
+
+    def _maybe_compact(self):
+        # Stale entries are dropped lazily; rebuild if they dominate the heap
+        if len(self._heap) > 2 * len(self._current) + 64:
+            self._heap = [(-q_value, self._seq[key], version, key)
+                          for key, (q_value, version) in self._current.items()]
+            heapq.heapify(self._heap)
+
+    def _add_key(self, task_key):
+        self._key_pos[task_key] = len(self._keys)
+        self._keys.append(task_key)
+
+    def _remove_key(self, task_key):
+        position = self._key_pos.pop(task_key)
+        last = self._keys.pop()
+        if last != task_key:
+            self._keys[position] = last
+            self._key_pos[last] = position
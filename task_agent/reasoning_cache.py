@@ -0,0 +1,107 @@
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+
+class ReasoningCache:
+    """LRU + TTL cache for LLM reasoning with an optional SQLite tier.
+
+    Keys combine the provider, task ID, task name and a bucketed Q-value, so a
+    task recommended again with an almost identical Q-value reuses the earlier
+    explanation instead of calling the LLM.
+    """
+
+    def __init__(self, max_entries=1024, ttl=3600, q_bucket=0.05, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.q_bucket = q_bucket
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS reasoning_cache (
+                    key TEXT PRIMARY KEY,
+                    reasoning TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+
+    def make_key(self, provider, task, q_value):
+        """Build the cache key for a task suggestion"""
+        bucket = math.floor(q_value / self.q_bucket) if self.q_bucket else q_value
+        return f"{provider}|{task['task_id']}|{task['name']}|{bucket}"
+
+    def get(self, key):
+        """Get cached reasoning, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, reasoning = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return reasoning
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT reasoning, expires_at FROM reasoning_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if row[1] > now:
+                        self._store(key, row[0], row[1])
+                        self.disk_hits += 1
+                        return row[0]
+                    self._db.execute("DELETE FROM reasoning_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key, reasoning):
+        """Cache reasoning in memory (and on disk, if enabled)"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, reasoning, expires_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO reasoning_cache (key, reasoning, expires_at) VALUES (?, ?, ?)",
+                    (key, reasoning, expires_at)
+                )
+                self._db.commit()
+
+    def _store(self, key, reasoning, expires_at):
+        self._entries[key] = (expires_at, reasoning)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "disk_tier": self._db is not None
+        }
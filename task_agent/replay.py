@@ -0,0 +1,206 @@
+import threading
+import time
+
+import numpy as np
+
+
+class ReplayBuffer:
+    """Fixed-size ring buffer of (task, reward, next available tasks, time) transitions.
+
+    Transitions live in preallocated NumPy arrays, so append() is O(1) and
+    never allocates. Task keys are interned to integer indices, and the
+    next-available set is stored as a snapshot ID: transitions recorded while
+    the task list is unchanged (same ``version``) share one snapshot.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._task = np.zeros(capacity, dtype=np.int64)
+        self._reward = np.zeros(capacity, dtype=np.float64)
+        self._next = np.zeros(capacity, dtype=np.int64)
+        self._time = np.zeros(capacity, dtype=np.float64)
+        self._size = 0
+        self.appended = 0  # Total transitions ever appended (sequence number)
+        self._lock = threading.Lock()
+
+        self.keys = []
+        self._key_index = {}
+        self._snapshots = {}  # snapshot ID -> array of key indices
+        self._snapshot_refs = {}
+        self._snapshot_version = None
+        self._snapshot_id = -1
+
+    def __len__(self):
+        return self._size
+
+    def _intern(self, task_key):
+        index = self._key_index.get(task_key)
+        if index is None:
+            index = self._key_index[task_key] = len(self.keys)
+            self.keys.append(task_key)
+        return index
+
+    def _snapshot(self, version, available_keys):
+        """Snapshot ID for the current available set, built once per version"""
+        if version != self._snapshot_version:
+            keys = available_keys()
+            if self._snapshot_refs.get(self._snapshot_id) == 0:
+                del self._snapshots[self._snapshot_id]
+                del self._snapshot_refs[self._snapshot_id]
+            self._snapshot_id += 1
+            self._snapshots[self._snapshot_id] = np.fromiter(
+                (self._intern(str(key)) for key in keys), dtype=np.int64, count=len(keys))
+            self._snapshot_refs[self._snapshot_id] = 0
+            self._snapshot_version = version
+        return self._snapshot_id
+
+    def append(self, task_id, reward, version, available_keys):
+        """Record a transition; returns its sequence number.
+
+        ``available_keys`` is only called when ``version`` differs from the
+        previous append, so callers pass a counter that changes with the
+        task list and a function listing the available task keys.
+        """
+        with self._lock:
+            snapshot = self._snapshot(version, available_keys)
+            slot = self.appended % self.capacity
+            if self._size == self.capacity:
+                self._release(int(self._next[slot]))
+            else:
+                self._size += 1
+            self._task[slot] = self._intern(str(task_id))
+            self._reward[slot] = reward
+            self._next[slot] = snapshot
+            self._time[slot] = time.time()
+            self._snapshot_refs[snapshot] += 1
+            self.appended += 1
+            return self.appended
+
+    def _release(self, snapshot):
+        self._snapshot_refs[snapshot] -= 1
+        if self._snapshot_refs[snapshot] == 0 and snapshot != self._snapshot_id:
+            del self._snapshots[snapshot]
+            del self._snapshot_refs[snapshot]
+
+    def sample(self, batch_size, rng=None):
+        """Uniform mini-batch as (task keys, rewards, next-available key index arrays).
+
+        Drawn without replacement and capped at the buffer size, so a nearly
+        empty buffer does not apply the same few rewards many times per batch.
+        """
+        rng = rng or np.random.default_rng()
+        with self._lock:
+            if not self._size:
+                return [], np.empty(0), []
+            slots = rng.choice(self._size, size=min(batch_size, self._size), replace=False)
+            tasks = self._task[slots]
+            rewards = self._reward[slots].copy()
+            snapshots = [self._snapshots[s] for s in self._next[slots].tolist()]
+            keys = [self.keys[i] for i in tasks.tolist()]
+        return keys, rewards, snapshots
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self._size,
+                "capacity": self.capacity,
+                "appended": self.appended,
+                "snapshots": len(self._snapshots),
+                "oldest_age_seconds": round(time.time() - self._time[:self._size].min(), 1) if self._size else None
+            }
+
+
+class ReplayTrainer:
+    """Applies bootstrapped Q-learning updates from mini-batches of a ReplayBuffer.
+
+    Each sampled transition moves Q(task) towards r + γ·max Q(next available),
+    through RLModel.update_q_values, so a whole batch is one vectorized update
+    and one persistence write. Runs on demand (train()) or on a background
+    thread that trains whenever new transitions have arrived.
+    """
+
+    def __init__(self, rl, buffer, batch_size=64, interval=1.0, batches_per_tick=4, on_update=None, seed=None):
+        self.rl = rl
+        self.buffer = buffer
+        # Called with update_q_values' results, e.g. to mirror them into SQLite
+        self.on_update = on_update
+        self.batch_size = batch_size
+        self.interval = interval
+        self.batches_per_tick = batches_per_tick
+        self.rng = np.random.default_rng(seed)
+        self.batches = 0
+        self.updates = 0
+        self._trained_until = 0
+        self._train_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _q_values(self, keys):
+        if hasattr(self.rl.q_table, "get_many"):
+            return self.rl.q_table.get_many(keys)
+        return np.fromiter((self.rl.q_table.get(key, 0.0) for key in keys), dtype=np.float64, count=len(keys))
+
+    def train_step(self):
+        """Sample one mini-batch and apply it; returns the number of updates"""
+        keys, rewards, snapshots = self.buffer.sample(self.batch_size, self.rng)
+        learnable = [self.rl.can_learn(key) for key in keys]
+        if not all(learnable):
+            # e.g. a task the linear backend no longer has features for
+            keys = [key for key, ok in zip(keys, learnable) if ok]
+            rewards = rewards[np.asarray(learnable, dtype=bool)]
+            snapshots = [snapshot for snapshot, ok in zip(snapshots, learnable) if ok]
+        if not keys:
+            return 0
+
+        # max Q over each distinct next-available set, looked up once per batch
+        next_max = {}
+        for snapshot in snapshots:
+            if id(snapshot) not in next_max:
+                next_keys = [self.buffer.keys[i] for i in snapshot.tolist()]
+                next_max[id(snapshot)] = self._q_values(next_keys).max() if next_keys else 0.0
+        bootstrap = np.array([next_max[id(snapshot)] for snapshot in snapshots])
+
+        targets = rewards + self.rl.gamma * bootstrap
+        results = self.rl.update_q_values(keys, targets)
+        if self.on_update is not None:
+            self.on_update(results)
+        self.batches += 1
+        self.updates += len(keys)
+        return len(keys)
+
+    def train(self, batches=1):
+        """Run mini-batches now; returns the number of updates"""
+        with self._train_lock:
+            self._trained_until = self.buffer.appended
+            return sum(self.train_step() for _ in range(batches))
+
+    def start(self):
+        """Train in the background every interval seconds (0 = on demand only)"""
+        if self.interval <= 0:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="replay-trainer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if self.buffer.appended == self._trained_until:
+                continue
+            try:
+                self.train(self.batches_per_tick)
+            except Exception as e:
+                print(f"Replay training failed: {e}")
+
+    def stats(self):
+        return {
+            "buffer": self.buffer.stats(),
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "updates": self.updates,
+            "pending": self.buffer.appended - self._trained_until,
+            "background": self._thread is not None and self._thread.is_alive()
+        }
@@ -1,31 +1,238 @@
 import json
+import os
+import threading
+import time
 import numpy as np
+from contextlib import contextmanager
 from pathlib import Path
+from task_agent.q_table import ArrayQTable
+from task_agent.journal import QJournal
+from task_agent.linear_policy import LinearPolicy
+from task_agent.binary_q_table import BinaryQTable, json_to_binary
+from task_agent.metrics import Q_PERSIST, Q_UPDATE
+from task_agent.q_stats import QStatistics, table_arrays
+
+CONFIGS_PATH = "task_agent/data/rl_configs.json"
+CONFIG_PARAMS = ("alpha", "gamma", "epsilon")
+
+def load_configs(path=CONFIGS_PATH):
+    """Load named hyperparameter configs (see task_agent/sweep.py)"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_config(name, config, path=CONFIGS_PATH):
+    """Save a named hyperparameter config, replacing any with the same name"""
+    configs = load_configs(path)
+    configs[name] = config
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(configs, f, indent=2)
+    os.replace(tmp_path, path)
 
 class RLModel:
-    def __init__(self, memory_path="task_agent/data/agent_memory.json"):
+    def __init__(self, memory_path="task_agent/data/agent_memory.json", backend=None, persistence=None, config=None):
         self.memory_path = memory_path
+        # "dict" (default), "array" for the NumPy-backed Q-table, "shared"
+        # for one memory-mapped table shared by all worker processes, or
+        # "linear" for a feature-based LinearPolicy instead of per-task entries
+        self.backend = backend or os.getenv("RL_QTABLE_BACKEND", "dict").lower()
+        # "json" (default) rewrites the file per update, "journal" appends to a
+        # log, "binary" memory-maps a compact .qbin file (see binary_q_table.py)
+        self.persistence = persistence or os.getenv("RL_PERSISTENCE", "json").lower()
+        if self.persistence == "binary" and self.backend != "dict":
+            print(f"Warning: binary persistence replaces the dict backend only, using json for '{self.backend}'")
+            self.persistence = "json"
+        if self.backend == "linear" and self.persistence == "journal":
+            # Journal entries are per-task values; the linear model saves its weights
+            print("Warning: journal persistence is not supported by the linear backend, using json")
+            self.persistence = "json"
+        # Label for persistence timings (see task_agent/metrics.py)
+        self.persist_mode = "shared" if self.backend == "shared" else self.persistence
+        self.journal = None
+        if self.persistence == "journal":
+            self.journal = QJournal(
+                Path(memory_path).with_suffix(".journal"),
+                sync_every=int(os.getenv("RL_JOURNAL_SYNC_EVERY", "100")),
+                sync_interval=float(os.getenv("RL_JOURNAL_SYNC_INTERVAL", "1.0"))
+            )
+            self.compact_every = int(os.getenv("RL_JOURNAL_COMPACT_EVERY", "10000"))
+        # Shared backend: only the owner process writes JSON snapshots
+        self.flush_interval = float(os.getenv("RL_SHARED_FLUSH_INTERVAL", "5.0"))
+        self._last_flush = time.monotonic()
+        # Serializes updates and snapshots (they share one .tmp path) and keeps
+        # journal appends out of the window between a snapshot and the journal reset
+        self._lock = threading.RLock()
         self.q_table = self.load_memory()
+        # Running statistics; the shared and linear backends are rescanned per call
+        # instead (other workers' writes, or every weight update, move their values)
+        self.q_stats = QStatistics()
+        self.ranking = None  # Optional RankingIndex, see attach_ranking()
         self.alpha = 0.1  # Learning rate
         self.gamma = 0.9  # Discount factor
+        self.epsilon = 0.2  # Exploration rate for choose_action
+        self.config = config or os.getenv("RL_CONFIG") or None
+        if self.config:
+            self.load_config(self.config)
+    
+    def load_config(self, name, path=CONFIGS_PATH):
+        """Apply a named alpha/gamma/epsilon config saved by a sweep"""
+        configs = load_configs(path)
+        if name not in configs:
+            raise ValueError(f"Unknown RL config '{name}' (available: {', '.join(configs) or 'none'})")
+        for param in CONFIG_PARAMS:
+            if param in configs[name]:
+                setattr(self, param, float(configs[name][param]))
+        self.config = name
         
     def load_memory(self):
-        """Load Q-table from JSON file"""
+        """Load Q-table from JSON file (plus journal, if enabled)"""
+        if self.backend == "linear":
+            return LinearPolicy.load(
+                self.linear_path(),
+                hash_buckets=int(os.getenv("RL_LINEAR_HASH_BUCKETS", "1024")),
+                learning_rate=float(os.getenv("RL_LINEAR_LEARNING_RATE", "1.0"))
+            )
+        
+        if self.persistence == "binary":
+            binary_path = self.binary_path()
+            if not binary_path.exists() and Path(self.memory_path).exists():
+                # One-time conversion; the JSON file is left as it was
+                json_to_binary(self.memory_path, binary_path)
+            binary_path.parent.mkdir(parents=True, exist_ok=True)
+            return BinaryQTable(binary_path)
+        
         try:
             with open(self.memory_path, "r") as f:
-                return json.load(f)
+                data = json.load(f)
         except FileNotFoundError:
             Path(self.memory_path).parent.mkdir(parents=True, exist_ok=True)
-            return {}
+            data = {}
+        
+        if self.backend == "shared":
+            from task_agent.shared_q_table import SharedQTable
+            # The JSON snapshot only seeds a newly created shared file
+            return SharedQTable(Path(self.memory_path).with_suffix(".shm"), initial=data)
+        
+        q_table = ArrayQTable(data) if self.backend == "array" else data
+        if self.journal is not None:
+            self.journal.replay(q_table)
+        return q_table
+    
+    def linear_path(self):
+        """Weights file of the linear backend, next to the Q-table JSON"""
+        return Path(self.memory_path).with_suffix(".linear.json")
+    
+    def binary_path(self):
+        """Q-table file of binary persistence, next to the Q-table JSON"""
+        return Path(self.memory_path).with_suffix(".qbin")
     
     def save_memory(self):
         """Save Q-table to JSON file"""
         Path(self.memory_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.memory_path, "w") as f:
-            json.dump(self.q_table, f, indent=2)
+        with self._lock:
+            if self.backend == "linear":
+                self.q_table.save(self.linear_path())
+                return
+            if self.persistence == "binary":
+                self.q_table.save()
+                return
+            self.export_json(self.memory_path)
+            
+            # The snapshot now covers every journaled update
+            if self.journal is not None:
+                self.journal.reset()
+    
+    def export_json(self, path=None):
+        """Write the Q-table as JSON (memory_path by default)"""
+        path = path or self.memory_path
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.q_table_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+    
+    def _persist(self, task_key, q_value):
+        """Persist a single Q-value change"""
+        if self.backend == "shared":
+            self._flush_shared()
+            return
+        
+        if self.journal is None:
+            self.save_memory()
+            return
+        
+        with self._lock:
+            self.journal.append(task_key, q_value)
+            if self.journal.entries >= self.compact_every:
+                self.save_memory()
+    
+    def _persist_many(self, updates):
+        """Persist a batch of Q-value changes with a single write"""
+        if self.backend == "shared":
+            self._flush_shared()
+            return
+        
+        if self.journal is None:
+            self.save_memory()
+            return
+        
+        with self._lock:
+            self.journal.append_many(updates)
+            if self.journal.entries >= self.compact_every:
+                self.save_memory()
+    
+    def _flush_shared(self):
+        """Snapshot the shared table to JSON if this process owns persistence"""
+        if time.monotonic() - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = time.monotonic()
+        if self.q_table.try_become_owner():
+            self.save_memory()
+    
+    @contextmanager
+    def _update_lock(self):
+        """Make read-modify-write updates atomic across threads, and processes (shared backend)"""
+        with self._lock:
+            if self.backend == "shared":
+                with self.q_table.lock():
+                    yield
+            else:
+                yield
+    
+    def close(self):
+        """Flush pending writes and release the Q-table's files (the model is unusable afterwards)"""
+        if self.journal is not None:
+            self.journal.close()
+        if self.backend == "shared" and self.q_table.try_become_owner():
+            self.save_memory()
+        if hasattr(self.q_table, "close"):
+            # Memory maps, file descriptors and lock files of the binary and shared tables
+            self.q_table.close()
+    
+    def q_table_dict(self):
+        """Get the Q-table as a plain dict"""
+        if isinstance(self.q_table, dict):
+            return self.q_table
+        return self.q_table.to_dict()
+    
+    def attach_ranking(self, ranking):
+        """Serve choose_action/top_k from an incrementally maintained RankingIndex"""
+        self.ranking = ranking
     
-    def choose_action(self, state, tasks, epsilon=0.2):
+    def choose_action(self, state, tasks, epsilon=None):
         """Choose action using epsilon-greedy policy"""
+        if epsilon is None:
+            epsilon = self.epsilon
+        if self.ranking is not None:
+            self.ranking.sync(tasks, self.q_table)
+            return self.ranking.choose(epsilon)
+        
+        if isinstance(self.q_table, (ArrayQTable, LinearPolicy)):
+            return self.q_table.choose(tasks, epsilon)
+        
         # Filter available tasks (not done)
         available_tasks = [t for t in tasks if t.get('status') != 'done']
         
@@ -50,38 +257,127 @@ class RLModel:
         
         return best_task or available_tasks[0]
     
+    def top_k(self, tasks, k=10, offset=0):
+        """Get available tasks ranked offset+1..offset+k by Q-value as (task, q_value) pairs"""
+        if self.ranking is not None:
+            self.ranking.sync(tasks, self.q_table)
+            return self.ranking.top_k(k, offset)
+        
+        if isinstance(self.q_table, (ArrayQTable, LinearPolicy)):
+            return self.q_table.top_k(tasks, offset + k)[offset:]
+        
+        available_tasks = [t for t in tasks if t.get('status') != 'done']
+        scored = [(t, self.q_table.get(str(t['task_id']), 0.0)) for t in available_tasks]
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored[offset:offset + k]
+    
+    def set_task_status(self, task_id, status):
+        """Keep selection indexes in sync with a task status change"""
+        task_key = str(task_id)
+        if isinstance(self.q_table, (ArrayQTable, LinearPolicy)):
+            self.q_table.set_available(task_key, status != 'done')
+        if self.ranking is not None:
+            self.ranking.set_available(task_key, status != 'done', self.q_table.get(task_key, 0.0))
+    
+    def can_learn(self, task_id):
+        """Whether feedback for a task can be applied (the linear backend needs its features)"""
+        return self.backend != "linear" or str(task_id) in self.q_table
+    
     def update_q_value(self, task_id, reward):
         """Update Q-value using Q-learning formula"""
         task_key = str(task_id)
-        old_q = self.q_table.get(task_key, 0.0)
+        with Q_UPDATE.time(kind="single"), self._update_lock():
+            old_q = self.q_table.get(task_key, 0.0)
+            
+            # Q-learning update: Q(s,a) = Q(s,a) + α[r + γ*max(Q(s',a')) - Q(s,a)]
+            # Simplified version without next state consideration
+            new_q = old_q + self.alpha * (reward - old_q)
+            
+            self.q_table[task_key] = new_q
+            self.q_stats.update(task_key, old_q, new_q)
+            # In the same critical section, so the heap sees writes in table order
+            if self.ranking is not None:
+                self.ranking.update(task_key, new_q)
+        with Q_PERSIST.time(mode=self.persist_mode):
+            self._persist(task_key, new_q)
         
-        # Q-learning update: Q(s,a) = Q(s,a) + α[r + γ*max(Q(s',a')) - Q(s,a)]
-        # Simplified version without next state consideration
-        new_q = old_q + self.alpha * (reward - old_q)
+        return {"old_q": old_q, "new_q": new_q}
+    
+    def update_q_values(self, task_ids, rewards):
+        """Apply a batch of rewards in one vectorized pass, then persist once.
         
-        self.q_table[task_key] = new_q
-        self.save_memory()
+        Repeated task IDs are applied in order, exactly as if update_q_value
+        had been called once per reward.
+        """
+        start = time.perf_counter()
+        keys = [str(task_id) for task_id in task_ids]
+        rewards = np.asarray(rewards, dtype=np.float64)
+        if not keys:
+            return {}
         
-        return {"old_q": old_q, "new_q": new_q}
+        # Group updates by task, keeping first-seen order
+        index = {}
+        inverse = np.fromiter((index.setdefault(key, len(index)) for key in keys), dtype=np.intp, count=len(keys))
+        unique_keys = list(index)
+        counts = np.bincount(inverse, minlength=len(unique_keys))
+        
+        # Occurrence rank of each update within its task's group
+        order = np.argsort(inverse, kind="stable")
+        rank = np.empty(len(keys), dtype=np.intp)
+        rank[order] = np.arange(len(keys)) - np.repeat(np.cumsum(counts) - counts, counts)
+        
+        # Unrolled Q <- Q + α(r - Q) over m rewards:
+        # Q_m = (1-α)^m Q_0 + Σ_j α(1-α)^(m-1-j) r_j
+        decay = 1.0 - self.alpha
+        weights = self.alpha * decay ** (counts[inverse] - 1 - rank) * rewards
+        
+        with self._update_lock():
+            if isinstance(self.q_table, ArrayQTable):
+                old_q = self.q_table.get_many(unique_keys)
+            else:
+                old_q = np.fromiter((self.q_table.get(key, 0.0) for key in unique_keys), dtype=np.float64, count=len(unique_keys))
+            new_q = decay ** counts * old_q + np.bincount(inverse, weights=weights, minlength=len(unique_keys))
+            
+            if isinstance(self.q_table, ArrayQTable):
+                self.q_table.set_many(unique_keys, new_q)
+            else:
+                self.q_table.update(zip(unique_keys, new_q.tolist()))
+            self.q_stats.update_many(unique_keys, old_q, new_q)
+            if self.ranking is not None:
+                for key, q_value in zip(unique_keys, new_q.tolist()):
+                    self.ranking.update(key, q_value)
+        Q_UPDATE.observe(time.perf_counter() - start, kind="batch")
+        with Q_PERSIST.time(mode=self.persist_mode):
+            self._persist_many(zip(unique_keys, new_q.tolist()))
+        
+        return {
+            key: {"old_q": old, "new_q": new}
+            for key, old, new in zip(unique_keys, old_q.tolist(), new_q.tolist())
+        }
     
     def get_task_statistics(self):
         """Get statistics about Q-table and learning"""
-        if not self.q_table:
-            return {
-                "total_tasks": 0,
-                "avg_q_value": 0.0,
-                "max_q_value": 0.0,
-                "min_q_value": 0.0,
-                "best_task_id": None
-            }
-        
-        q_values = list(self.q_table.values())
-        best_task_id = max(self.q_table.keys(), key=lambda k: self.q_table[k])
+        if self.backend in ("shared", "linear"):
+            return QStatistics().summary(self.q_table)
+        return self.q_stats.summary(self.q_table)
+    
+    def q_table_page(self, limit=100, offset=0, min_q=None, max_q=None, order="desc"):
+        """One page of (task_key, q_value) entries sorted by Q-value, and the number matching the filters"""
+        keys, values = table_arrays(self.q_table)
+        matched = np.arange(len(values))
+        if min_q is not None:
+            matched = matched[values[matched] >= min_q]
+        if max_q is not None:
+            matched = matched[values[matched] <= max_q]
         
-        return {
-            "total_tasks": len(self.q_table),
-            "avg_q_value": np.mean(q_values),
-            "max_q_value": max(q_values),
-            "min_q_value": min(q_values),
-            "best_task_id": best_task_id
-        }
\ No newline at end of file
+        # Sort only the first offset + limit entries; ties keep table order
+        sort_values = -values[matched] if order == "desc" else values[matched]
+        end = offset + limit
+        if end < len(matched):
+            # Everything up to the end-th value, so ties at the page boundary stay in order
+            head = np.flatnonzero(sort_values <= np.partition(sort_values, end - 1)[end - 1])
+            ranked = head[np.argsort(sort_values[head], kind="stable")]
+        else:
+            ranked = np.argsort(sort_values, kind="stable")
+        page = matched[ranked[offset:end]]
+        return [(keys[i], float(values[i])) for i in page.tolist()], len(matched)
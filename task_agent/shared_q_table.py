@@ -0,0 +1,195 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+# File layout: a 64-byte header followed by fixed-size (key, value) records.
+# Records are append-only, so growing the file never moves existing slots.
+MAGIC = b"RLQS"
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+KEY_BYTES = 32
+RECORD = np.dtype([("key", f"S{KEY_BYTES}"), ("value", "<f8")])
+
+
+class SharedQTable:
+    """Q-table in a memory-mapped file shared by every worker process.
+
+    Reads are lock-free: each process maps the file and keeps a local
+    key -> slot index that it extends when the header's record count grows.
+    Writes and read-modify-write updates take an exclusive flock on
+    ``<path>.lock`` (see lock()), so concurrent workers never lose updates.
+    One process at a time can hold ``<path>.owner`` and is responsible for
+    writing JSON snapshots (see try_become_owner()).
+    """
+
+    def __init__(self, path, initial=None, capacity=65536):
+        self.path = str(path)
+        self.is_owner = False
+        self._owner_file = None
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._lock_file = open(self.path + ".lock", "a+")
+        self._slots = {}
+        self._known = 0
+        self._mm = None
+
+        with self.lock():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            created = os.fstat(self._fd).st_size < HEADER_SIZE
+            if created:
+                os.ftruncate(self._fd, HEADER_SIZE + capacity * RECORD.itemsize)
+                os.pwrite(self._fd, struct.pack("<4sIQQQ", MAGIC, FORMAT_VERSION, capacity, 0, 0), 0)
+            elif os.pread(self._fd, 4, 0) != MAGIC:
+                raise ValueError(f"{self.path} is not a shared Q-table file")
+            self._map()
+            if created and initial:
+                for key, value in initial.items():
+                    self._set_locked(str(key), value)
+
+    # Mapping
+
+    def _map(self):
+        capacity = struct.unpack("<Q", os.pread(self._fd, 8, 8))[0]
+        self._mm = mmap.mmap(self._fd, HEADER_SIZE + capacity * RECORD.itemsize)
+        # [capacity, count, updates]
+        self._meta = np.frombuffer(self._mm, dtype="<u8", count=3, offset=8)
+        self._records = np.frombuffer(self._mm, dtype=RECORD, count=capacity, offset=HEADER_SIZE)
+        self._values = self._records["value"]
+        self._capacity = capacity
+
+    def _refresh(self):
+        """Pick up records appended by other processes"""
+        count = int(self._meta[1])
+        if count > self._capacity:
+            self._map()
+        if count > self._known:
+            for offset, key in enumerate(self._records["key"][self._known:count]):
+                self._slots[key.decode()] = self._known + offset
+            self._known = count
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        os.ftruncate(self._fd, HEADER_SIZE + capacity * RECORD.itemsize)
+        self._meta[0] = capacity
+        self._map()
+
+    # Locking
+
+    @contextmanager
+    def lock(self):
+        """Exclusive cross-process lock (re-entrant within a process)"""
+        with self._thread_lock:
+            if self._depth == 0:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def try_become_owner(self):
+        """Claim the persistence role if no live process holds it"""
+        if self.is_owner:
+            return True
+        if self._owner_file is None:
+            self._owner_file = open(self.path + ".owner", "a+")
+        try:
+            fcntl.flock(self._owner_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        self.is_owner = True
+        return True
+
+    def close(self):
+        if self._owner_file is not None:
+            self._owner_file.close()
+            self._owner_file = None
+            self.is_owner = False
+        self._meta = self._records = self._values = None
+        self._mm = None
+        os.close(self._fd)
+        self._lock_file.close()
+
+    # Dict interface
+
+    def _set_locked(self, task_key, value):
+        self._refresh()
+        slot = self._slots.get(task_key)
+        if slot is None:
+            encoded = task_key.encode()
+            if len(encoded) > KEY_BYTES:
+                raise ValueError(f"Task key longer than {KEY_BYTES} bytes: {task_key!r}")
+            slot = self._known
+            if slot >= self._capacity:
+                self._grow()
+            self._records["key"][slot] = encoded
+            self._values[slot] = value
+            # Publish the record only after it is fully written
+            self._meta[1] = slot + 1
+            self._slots[task_key] = slot
+            self._known = slot + 1
+        else:
+            self._values[slot] = value
+        self._meta[2] += 1
+
+    def __setitem__(self, task_key, value):
+        with self.lock():
+            self._set_locked(task_key, value)
+
+    def update(self, items):
+        with self.lock():
+            for task_key, value in items:
+                self._set_locked(task_key, value)
+
+    def get(self, task_key, default=None):
+        slot = self._slots.get(task_key)
+        if slot is None:
+            self._refresh()
+            slot = self._slots.get(task_key)
+            if slot is None:
+                return default
+        return float(self._values[slot])
+
+    def __getitem__(self, task_key):
+        value = self.get(task_key)
+        if value is None:
+            raise KeyError(task_key)
+        return value
+
+    def __contains__(self, task_key):
+        return self.get(task_key) is not None
+
+    def __len__(self):
+        self._refresh()
+        return self._known
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        self._refresh()
+        return list(self._slots)
+
+    def values(self):
+        self._refresh()
+        return self._values[:self._known].copy()
+
+    def items(self):
+        self._refresh()
+        return zip(list(self._slots), self._values[:self._known].tolist())
+
+    def to_dict(self):
+        """Export as a plain dict (for JSON persistence and API responses)"""
+        return dict(self.items())
+
+    @property
+    def update_count(self):
+        """Total writes across all processes"""
+        return int(self._meta[2])
@@ -0,0 +1,132 @@
+import numpy as np
+
+# Reward model from tests/simulation_test.py, as lookup arrays
+PRIORITY_LEVELS = ("low", "medium", "high", "critical")
+PRIORITY_BONUS = np.array([0.0, 0.1, 0.2, 0.3])
+COMPLEXITY_LEVELS = ("low", "medium", "high")
+COMPLEXITY_BONUS = np.array([0.2, 0.1, 0.0])
+BASE_REWARD = 0.5
+NOISE_LOW, NOISE_HIGH = -0.1, 0.2
+
+
+def expected_reward(mean):
+    """Expected value of clip(mean + U(NOISE_LOW, NOISE_HIGH), 0, 1)"""
+    mean = np.asarray(mean, dtype=np.float64)
+    low, high = mean + NOISE_LOW, mean + NOISE_HIGH
+    # Rewards never reach 0 (mean >= BASE_REWARD), only the upper clip matters
+    partial = ((1.0 - low) * (1.0 + low) / 2 + (high - 1.0)) / (high - low)
+    return np.where(high <= 1.0, (low + high) / 2, np.where(low >= 1.0, 1.0, partial))
+
+
+class BatchSimulation:
+    """Many independent epsilon-greedy Q-learning agents trained in lock-step.
+
+    Q-values live in one (n_agents, n_tasks) array and every step picks a task,
+    samples a reward and applies Q <- Q + α(r - Q) for all agents at once, with
+    the same update rule as RLModel.update_q_value. With gamma > 0 the target
+    is r + γ·max Q over the available tasks instead, as in ReplayTrainer
+    (applied online rather than from sampled mini-batches). Nothing is
+    written to disk.
+    """
+
+    def __init__(self, priorities, complexities, n_agents=1000, alpha=0.1, epsilon=0.2,
+                 available=None, task_ids=None, initial_q=0.0, gamma=0.0, seed=None):
+        self.priorities = np.asarray(priorities, dtype=np.intp)
+        self.complexities = np.asarray(complexities, dtype=np.intp)
+        self.n_tasks = len(self.priorities)
+        self.n_agents = n_agents
+        self.alpha = alpha
+        self.epsilon = epsilon
+        self.gamma = gamma
+        self.task_ids = list(task_ids) if task_ids is not None else list(range(1, self.n_tasks + 1))
+        self.rng = np.random.default_rng(seed)
+
+        self.reward_mean = BASE_REWARD + PRIORITY_BONUS[self.priorities] + COMPLEXITY_BONUS[self.complexities]
+        self.available = np.ones(self.n_tasks, dtype=bool) if available is None else np.asarray(available, dtype=bool)
+        self._available_idx = np.flatnonzero(self.available)
+        if not len(self._available_idx):
+            raise ValueError("No available tasks to simulate")
+        # Unavailable tasks can never win the argmax
+        self._mask = np.where(self.available, 0.0, -np.inf)
+
+        self.expected = expected_reward(self.reward_mean)
+        self.best_expected = self.expected[self._available_idx].max()
+        # RLModel starts unseen tasks at 0.0; a higher initial_q explores optimistically
+        self.q = np.full((n_agents, self.n_tasks), float(initial_q))
+        self._agents = np.arange(n_agents)
+        self.episodes = 0
+
+    @classmethod
+    def synthetic(cls, n_tasks, n_agents=1000, seed=None, **kwargs):
+        """Simulate a random task set with uniformly drawn priority and complexity"""
+        rng = np.random.default_rng(seed)
+        return cls(
+            rng.integers(len(PRIORITY_LEVELS), size=n_tasks),
+            rng.integers(len(COMPLEXITY_LEVELS), size=n_tasks),
+            n_agents=n_agents, seed=seed, **kwargs
+        )
+
+    @classmethod
+    def from_tasks(cls, tasks, n_agents=1000, **kwargs):
+        """Simulate a tasks.json-style task list (unknown levels count as medium)"""
+        priority_index = {level: i for i, level in enumerate(PRIORITY_LEVELS)}
+        complexity_index = {level: i for i, level in enumerate(COMPLEXITY_LEVELS)}
+        return cls(
+            [priority_index.get(t.get('priority', 'medium'), 1) for t in tasks],
+            [complexity_index.get(t.get('complexity', 'medium'), 1) for t in tasks],
+            n_agents=n_agents,
+            available=[t.get('status') != 'done' for t in tasks],
+            task_ids=[t['task_id'] for t in tasks],
+            **kwargs
+        )
+
+    def step(self):
+        """Advance every agent by one episode; returns (choices, rewards)"""
+        masked = self.q + self._mask
+        greedy = masked.argmax(axis=1)
+        explore = self.rng.random(self.n_agents) < self.epsilon
+        random_choice = self._available_idx[self.rng.integers(len(self._available_idx), size=self.n_agents)]
+        choices = np.where(explore, random_choice, greedy)
+
+        noise = self.rng.uniform(NOISE_LOW, NOISE_HIGH, size=self.n_agents)
+        rewards = np.clip(self.reward_mean[choices] + noise, 0.0, 1.0)
+
+        targets = rewards
+        if self.gamma:
+            # The task set is static, so every next state offers the same tasks
+            targets = rewards + self.gamma * masked[self._agents, greedy]
+
+        old_q = self.q[self._agents, choices]
+        self.q[self._agents, choices] = old_q + self.alpha * (targets - old_q)
+        self.episodes += self.n_agents
+        return choices, rewards
+
+    def run(self, steps, record_every=1):
+        """Run steps episodes per agent and return agent-averaged learning curves.
+
+        Each curve point averages the recorded steps since the previous point:
+        mean_reward, regret (best expected reward minus the chosen task's) and
+        optimal_rate (share of choices that were an optimal task).
+        """
+        optimal = self.expected >= self.best_expected - 1e-12
+        points = steps // record_every
+        curves = {name: np.zeros(points) for name in ("mean_reward", "regret", "optimal_rate")}
+
+        for i in range(points * record_every):
+            choices, rewards = self.step()
+            point = i // record_every
+            curves["mean_reward"][point] += rewards.mean()
+            curves["regret"][point] += self.best_expected - self.expected[choices].mean()
+            curves["optimal_rate"][point] += optimal[choices].mean()
+        for curve in curves.values():
+            curve /= record_every
+
+        curves["step"] = (np.arange(points) + 1) * record_every
+        curves["cumulative_regret"] = np.cumsum(curves["regret"]) * record_every
+        curves["episodes"] = self.episodes
+        return curves
+
+    def q_table(self):
+        """Agent-averaged Q-values in RLModel's {task_id: q} format"""
+        mean_q = self.q.mean(axis=0)
+        return {str(task_id): float(q) for task_id, q in zip(self.task_ids, mean_q)}
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter sweep for the Q-learning agent.
+
+Runs BatchSimulation training for every alpha/gamma/epsilon config on a
+process pool, prints a table ranked by final regret and can save the winner
+as a named config for RLModel(config=...) / RL_CONFIG.
+
+    python -m task_agent.sweep --save tuned
+    python -m task_agent.sweep --search random --samples 32 --save tuned
+    python -m task_agent.sweep --replay --save tuned-replay
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from task_agent.rl_model import CONFIGS_PATH, save_config
+from task_agent.simulation import BatchSimulation
+
+# gamma only affects replay training (RL_REPLAY), which bootstraps towards
+# r + γ·max Q; direct feedback updates have no next-state term. --replay
+# simulates the bootstrapped update and adds gamma to the search, otherwise
+# it is left out of the search and of saved configs.
+DEFAULT_GRID = {
+    "alpha": [0.05, 0.1, 0.2, 0.3, 0.5],
+    "epsilon": [0.02, 0.05, 0.1, 0.2, 0.3],
+}
+REPLAY_GRID = {**DEFAULT_GRID, "gamma": [0.5, 0.8, 0.9, 0.95]}
+DEFAULT_RANGES = {
+    "alpha": (0.01, 0.5),
+    "epsilon": (0.01, 0.4),
+}
+REPLAY_RANGES = {**DEFAULT_RANGES, "gamma": (0.5, 0.99)}
+
+
+def grid_configs(grid=None):
+    """Every combination of the grid's values"""
+    grid = grid or DEFAULT_GRID
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def random_configs(samples, ranges=None, seed=None):
+    """Configs drawn uniformly from (low, high) ranges"""
+    ranges = ranges or DEFAULT_RANGES
+    rng = np.random.default_rng(seed)
+    return [
+        {name: round(float(rng.uniform(low, high)), 4) for name, (low, high) in ranges.items()}
+        for _ in range(samples)
+    ]
+
+
+def evaluate(params, n_tasks=100, n_agents=2000, steps=500, initial_q=0.0, tolerance=0.005, seed=0):
+    """Train one config in simulation and summarize its learning curve.
+
+    Every config sees the same synthetic task set and random stream (seed),
+    so differences come from the hyperparameters alone. convergence_step is
+    the first step after which the regret curve stays within tolerance of
+    its final value.
+    """
+    start = time.time()
+    sim = BatchSimulation.synthetic(
+        n_tasks, n_agents=n_agents, alpha=params["alpha"], epsilon=params["epsilon"],
+        gamma=params.get("gamma", 0.0), initial_q=initial_q, seed=seed
+    )
+    curves = sim.run(steps, record_every=max(1, steps // 100))
+    regret = curves["regret"]
+    tail = max(1, len(regret) // 10)
+    final_regret = float(regret[-tail:].mean())
+
+    unsettled = np.flatnonzero(np.abs(regret - final_regret) > tolerance)
+    if not len(unsettled):
+        convergence_step = int(curves["step"][0])
+    elif unsettled[-1] + 1 < len(regret):
+        convergence_step = int(curves["step"][unsettled[-1] + 1])
+    else:
+        convergence_step = None
+
+    return {
+        **params,
+        "final_regret": round(final_regret, 5),
+        "cumulative_regret": round(float(curves["cumulative_regret"][-1]), 3),
+        "optimal_rate": round(float(curves["optimal_rate"][-tail:].mean()), 4),
+        "convergence_step": convergence_step,
+        "seconds": round(time.time() - start, 2)
+    }
+
+
+def _evaluate(job):
+    params, kwargs = job
+    return evaluate(params, **kwargs)
+
+
+def run_sweep(configs, workers=None, **kwargs):
+    """Evaluate configs across a process pool; best (lowest final regret) first"""
+    jobs = [(params, kwargs) for params in configs]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        results = list(executor.map(_evaluate, jobs))
+    # Ties on regret go to the config that settles sooner
+    results.sort(key=lambda r: (r["final_regret"], r["convergence_step"] is None, r["convergence_step"] or 0))
+    return results
+
+
+def format_table(results):
+    """Results as a fixed-width text table"""
+    lines = [f"{'alpha':>7} {'gamma':>6} {'epsilon':>8} {'final regret':>13} {'cum. regret':>12} {'optimal':>8} {'converged @':>12}"]
+    for r in results:
+        converged = "-" if r["convergence_step"] is None else str(r["convergence_step"])
+        gamma = f"{r['gamma']:.2f}" if "gamma" in r else "-"
+        lines.append(
+            f"{r['alpha']:>7.3f} {gamma:>6} {r['epsilon']:>8.3f} {r['final_regret']:>13.4f} "
+            f"{r['cumulative_regret']:>12.1f} {r['optimal_rate']:>8.1%} {converged:>12}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep RL hyperparameters in simulation")
+    parser.add_argument("--search", choices=["grid", "random"], default="grid")
+    parser.add_argument("--samples", type=int, default=25, help="Configs to draw for random search")
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--agents", type=int, default=2000)
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--initial-q", type=float, default=0.0, help="Initial Q-value (RLModel uses 0.0)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--replay", action="store_true", help="Simulate replay training's bootstrapped update and sweep gamma")
+    parser.add_argument("--save", metavar="NAME", help="Save the best config under this name")
+    args = parser.parse_args()
+
+    if args.search == "grid":
+        configs = grid_configs(REPLAY_GRID if args.replay else DEFAULT_GRID)
+    else:
+        configs = random_configs(args.samples, REPLAY_RANGES if args.replay else DEFAULT_RANGES, seed=args.seed)
+
+    start = time.time()
+    results = run_sweep(
+        configs, workers=args.workers, n_tasks=args.tasks, n_agents=args.agents,
+        steps=args.steps, initial_q=args.initial_q, seed=args.seed
+    )
+    print(f"Evaluated {len(results)} configs in {time.time() - start:.1f}s "
+          f"({args.agents} agents x {args.steps} steps, {args.tasks} tasks each)\n")
+    print(format_table(results))
+
+    if args.save:
+        best = results[0]
+        save_config(args.save, {
+            **{param: best[param] for param in ("alpha", "gamma", "epsilon") if param in best},
+            "final_regret": best["final_regret"],
+            "convergence_step": best["convergence_step"]
+        })
+        print(f"\nSaved best config as '{args.save}' in {CONFIGS_PATH} (use RL_CONFIG={args.save})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+
+class TaskCache:
+    """In-memory view of tasks.json with by-ID and per-status indexes.
+
+    The file is only re-parsed when its mtime or size changes. The returned
+    lists are shared with the cache, so callers must treat them as read-only.
+    """
+
+    def __init__(self, path="task_agent/data/tasks.json"):
+        self.path = path
+        self.tasks = []
+        self.by_id = {}
+        self.by_status = {}
+        self.version = 0
+        self._signature = None
+        self._status_lists = {}
+        self._lock = threading.RLock()
+
+    def _stat_signature(self):
+        stat = os.stat(self.path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self):
+        """Reload the file if it changed since the last load"""
+        signature = self._stat_signature()
+        if signature == self._signature:
+            return
+        with self._lock:
+            if signature == self._signature:
+                return
+            with open(self.path, "r") as f:
+                tasks = json.load(f)
+            self._index(tasks)
+            self._signature = signature
+
+    def _index(self, tasks):
+        self.tasks = tasks
+        self.by_id = {task['task_id']: task for task in tasks}
+        self.by_status = {}
+        for task in tasks:
+            self.by_status.setdefault(task.get('status'), {})[task['task_id']] = task
+        self._status_lists = {}
+        self.version += 1
+
+    def get_all(self):
+        """Get all tasks"""
+        self.refresh()
+        return self.tasks
+
+    def get_by_status(self, status):
+        """Get tasks with the given status"""
+        self.refresh()
+        tasks = self._status_lists.get(status)
+        if tasks is None:
+            tasks = list(self.by_status.get(status, {}).values())
+            self._status_lists[status] = tasks
+        return tasks
+
+    def get(self, task_id):
+        """Get a single task by ID, or None"""
+        self.refresh()
+        return self.by_id.get(task_id)
+
+    def update_status(self, task_id, status, reward=None):
+        """Update a task in place and write the file; returns the task or None"""
+        with self._lock:
+            self.refresh()
+            task = self.by_id.get(task_id)
+            if task is None:
+                return None
+
+            old_status = task.get('status')
+            self.by_status.get(old_status, {}).pop(task_id, None)
+            self.by_status.setdefault(status, {})[task_id] = task
+            self._status_lists.pop(old_status, None)
+            self._status_lists.pop(status, None)
+            task['status'] = status
+            if reward is not None:
+                task['reward'] = reward
+            self.version += 1
+
+            self._write()
+            return task
+
+    def add_tasks(self, tasks):
+        """Insert or replace tasks by ID and write the file once; returns the count"""
+        with self._lock:
+            try:
+                self.refresh()
+            except FileNotFoundError:
+                self._index([])
+
+            # Build a new list so selection caches keyed on the old one resync
+            merged = list(self.tasks)
+            positions = {task['task_id']: i for i, task in enumerate(merged)}
+            count = 0
+            for task in tasks:
+                position = positions.get(task['task_id'])
+                if position is None:
+                    positions[task['task_id']] = len(merged)
+                    merged.append(task)
+                else:
+                    merged[position] = task
+                count += 1
+
+            self._index(merged)
+            self._write()
+            return count
+
+    def _write(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.tasks, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._signature = self._stat_signature()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_task_cache(path="task_agent/data/tasks.json"):
+    """Get the process-wide cache for a tasks file"""
+    key = str(Path(path).resolve())
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = TaskCache(path)
+        return cache
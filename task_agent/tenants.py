@@ -0,0 +1,210 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from task_agent.ranking import RankingIndex
+from task_agent.rl_model import RLModel
+from task_agent.task_store import TaskCache
+
+DEFAULT_TENANT = "default"
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+TENANT_PATH_PREFIX = "/t/"
+
+
+def attach_task_store(rl, task_cache):
+    """Connect a model to the JSON task store it selects from"""
+    if rl.backend == "linear":
+        # Feedback can arrive for tasks the policy has not scored yet
+        rl.q_table.lookup = lambda task_key: task_cache.get(int(task_key))
+    elif rl.backend != "shared":
+        # Incremental top-k over the cached JSON tasks. Not used with the
+        # shared table: other workers' updates would bypass it.
+        rl.attach_ranking(RankingIndex())
+
+
+class Tenant:
+    """One project's Q-learning model and task store"""
+
+    def __init__(self, tenant_id, rl, tasks):
+        self.tenant_id = tenant_id
+        self.rl = rl
+        self.tasks = tasks
+        self.in_use = 0  # Requests currently holding the tenant; pinned tenants are not evicted
+        self.last_used = time.time()
+
+
+def load_tenant(tenant_id, data_dir):
+    """Default loader: <data_dir>/<tenant_id>/ holds the tenant's tasks.json and Q-table"""
+    tenant_dir = Path(data_dir) / tenant_id
+    tenant_dir.mkdir(parents=True, exist_ok=True)
+    tasks_path = tenant_dir / "tasks.json"
+    if not tasks_path.exists():
+        tasks_path.write_text("[]")
+
+    rl = RLModel(memory_path=str(tenant_dir / "agent_memory.json"))
+    # Not the process-wide get_task_cache(): evicted tenants must not stay referenced
+    tasks = TaskCache(str(tasks_path))
+    attach_task_store(rl, tasks)
+    return Tenant(tenant_id, rl, tasks)
+
+
+class TenantManager:
+    """Per-tenant models and task stores, loaded lazily and bounded by LRU eviction.
+
+    At most ``max_resident`` tenants stay in memory; loading one more evicts
+    the least recently used tenant that no request is holding, after flushing
+    its Q-table. Callers pair acquire() with release() (or use ``with
+    manager.use(tenant_id)``) so a tenant is never evicted mid-request.
+    """
+
+    def __init__(self, data_dir="task_agent/data/tenants", max_resident=100, loader=load_tenant):
+        self.data_dir = data_dir
+        self.max_resident = max_resident
+        self.loader = loader
+        self._tenants = OrderedDict()
+        self._evicting = {}  # Evicted but not yet flushed; reused if requested again
+        self._load_locks = {}  # Per tenant ID, also held while flushing an evicted tenant
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def _pin(self, tenant):
+        tenant.in_use += 1
+        tenant.last_used = time.time()
+        self._tenants.move_to_end(tenant.tenant_id)
+        return tenant
+
+    def acquire(self, tenant_id):
+        """Get a tenant, loading it on first use, and pin it until release()"""
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"Invalid tenant ID '{tenant_id}' (1-64 letters, digits, '-' or '_')")
+
+        while True:
+            with self._lock:
+                tenant = self._tenants.get(tenant_id)
+                if tenant is not None:
+                    self.hits += 1
+                    return self._pin(tenant)
+                load_lock = self._load_locks.setdefault(tenant_id, threading.Lock())
+
+            with load_lock:
+                with self._lock:
+                    if self._load_locks.get(tenant_id) is not load_lock:
+                        continue  # Dropped after a flush while we waited; take the new one
+                    tenant = self._tenants.get(tenant_id) or self._evicting.pop(tenant_id, None)
+                    if tenant is not None:
+                        self._tenants[tenant_id] = tenant
+                        self.hits += 1
+                        return self._pin(tenant)
+
+                tenant = self.loader(tenant_id, self.data_dir)
+                with self._lock:
+                    self._tenants[tenant_id] = tenant
+                    self.loads += 1
+                    self._pin(tenant)
+                    evicted = self._evict_lru()
+            self._flush_evicted(evicted)
+            return tenant
+
+    def release(self, tenant):
+        """Unpin a tenant; evicts if tenants pinned during a load left too many resident"""
+        with self._lock:
+            tenant.in_use -= 1
+            tenant.last_used = time.time()
+            evicted = self._evict_lru()
+        self._flush_evicted(evicted)
+
+    @contextmanager
+    def use(self, tenant_id):
+        """Hold a tenant for the duration of a with-block"""
+        tenant = self.acquire(tenant_id)
+        try:
+            yield tenant
+        finally:
+            self.release(tenant)
+
+    def _evict_lru(self):
+        """Pop unpinned tenants beyond max_resident, oldest first (caller holds the lock)"""
+        evicted = []
+        excess = len(self._tenants) - self.max_resident
+        for tenant_id in list(self._tenants):
+            if excess <= 0:
+                break
+            tenant = self._tenants[tenant_id]
+            if tenant.in_use:
+                continue
+            del self._tenants[tenant_id]
+            self._evicting[tenant_id] = tenant
+            evicted.append(tenant)
+            excess -= 1
+            self.evictions += 1
+        return evicted
+
+    def _flush_evicted(self, evicted):
+        for tenant in evicted:
+            with self._lock:
+                load_lock = self._load_locks.get(tenant.tenant_id)
+            if load_lock is None:
+                continue  # Already flushed after an earlier eviction
+            with load_lock:
+                with self._lock:
+                    # Requested again before we got here: it is resident once more
+                    if self._evicting.get(tenant.tenant_id) is not tenant:
+                        continue
+                    del self._evicting[tenant.tenant_id]
+                self._flush(tenant)
+                with self._lock:
+                    # One lock per resident tenant only; acquire() retries if it was waiting on this one
+                    del self._load_locks[tenant.tenant_id]
+
+    def _flush(self, tenant):
+        try:
+            tenant.rl.close()
+        except Exception as e:
+            print(f"Failed to flush tenant {tenant.tenant_id}: {e}")
+
+    def close(self):
+        """Flush every resident tenant (on shutdown)"""
+        with self._lock:
+            tenants = list(self._tenants.values()) + list(self._evicting.values())
+            self._tenants.clear()
+            self._evicting.clear()
+        for tenant in tenants:
+            self._flush(tenant)
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            return {
+                "resident": [
+                    {"tenant_id": tenant.tenant_id, "q_entries": len(tenant.rl.q_table),
+                     "tasks": len(tenant.tasks.tasks), "in_use": tenant.in_use,
+                     "idle_seconds": round(now - tenant.last_used, 1)}
+                    for tenant in reversed(self._tenants.values())
+                ],
+                "resident_count": len(self._tenants),
+                "max_resident": self.max_resident,
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions
+            }
+
+
+class TenantPathMiddleware:
+    """ASGI middleware mapping ``/t/{tenant_id}/path`` to ``/path`` with an X-Tenant-ID header"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(TENANT_PATH_PREFIX):
+            tenant_id, _, rest = scope["path"][len(TENANT_PATH_PREFIX):].partition("/")
+            path = "/" + rest
+            headers = [(name, value) for name, value in scope["headers"] if name != b"x-tenant-id"]
+            headers.append((b"x-tenant-id", tenant_id.encode()))
+            scope = {**scope, "path": path, "raw_path": path.encode(), "headers": headers}
+        await self.app(scope, receive, send)
@@ -15,7 +15,8 @@ def load_env():
                 line = line.strip()
                 if line and not line.startswith('#') and '=' in line:
                     key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+                    # Drop inline comments: KEY=value  # note
+                    os.environ[key.strip()] = value.split(' #', 1)[0].strip()
 
 load_env()
 
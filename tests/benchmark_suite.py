@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: RLModel, TaskDatabase and API endpoints on synthetic task sets.
+
+Each size runs in its own temporary directory (tasks.json, agent_memory.json
+and tasks.db are generated there), so the real data is never touched.
+
+    python tests/benchmark_suite.py --output bench.json
+    python tests/benchmark_suite.py --sizes 1000 --baseline bench.json --output new.json
+
+With --baseline the run is compared against a saved result file and exits
+non-zero if any benchmark's median slowed down by more than --threshold.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+PRIORITIES = ["low", "medium", "high", "critical"]
+COMPLEXITIES = ["low", "medium", "high"]
+
+
+def make_tasks(n, seed=0):
+    """Synthetic tasks: 80% pending, 10% in progress, 10% done"""
+    rng = random.Random(seed)
+    statuses = ["pending"] * 8 + ["in_progress", "done"]
+    return [
+        {
+            "task_id": i,
+            "name": f"Task {i}",
+            "status": rng.choice(statuses),
+            "reward": 0,
+            "priority": rng.choice(PRIORITIES),
+            "complexity": rng.choice(COMPLEXITIES)
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def make_q_table(n, seed=0):
+    """Q-values for roughly half of the tasks"""
+    rng = random.Random(seed)
+    return {str(i): rng.random() for i in range(1, n + 1) if rng.random() < 0.5}
+
+
+def timed(fn, budget=1.0, max_runs=200):
+    """Call fn repeatedly until the time budget or max_runs is used up (at least once)"""
+    samples = []
+    deadline = time.perf_counter() + budget
+    while not samples or (len(samples) < max_runs and time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "runs": len(samples),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 4),
+        "min_ms": round(samples[0], 4)
+    }
+
+
+def timed_once(fn):
+    start = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    return {"runs": 1, "mean_ms": round(elapsed, 4), "median_ms": round(elapsed, 4),
+            "p95_ms": round(elapsed, 4), "min_ms": round(elapsed, 4)}
+
+
+def bench_rl_model(tasks, n, rng, budget, max_runs):
+    from task_agent.rl_model import RLModel
+
+    rl = RLModel("task_agent/data/agent_memory.json")
+    results = {
+        "rl.choose_action": timed(lambda: rl.choose_action("state", tasks), budget, max_runs),
+        "rl.update_q_value": timed(lambda: rl.update_q_value(rng.randint(1, n), rng.random()), budget, max_runs),
+        "rl.update_q_values[100]": timed(
+            lambda: rl.update_q_values([rng.randint(1, n) for _ in range(100)], [rng.random() for _ in range(100)]),
+            budget, max_runs
+        ),
+        "rl.get_task_statistics": timed(rl.get_task_statistics, budget, max_runs)
+    }
+    rl.close()
+    return results
+
+
+def bench_database(tasks, n, rng, budget, max_runs):
+    from task_agent.database import TaskDatabase
+
+    db = TaskDatabase("task_agent/data/bench.db")
+    results = {"db.add_tasks[all]": timed_once(lambda: db.add_tasks(tasks))}
+    results.update({
+        "db.get_ranked_tasks[10]": timed(lambda: db.get_ranked_tasks(limit=10), budget, max_runs),
+        "db.choose_task": timed(db.choose_task, budget, max_runs),
+        "db.get_tasks_by_status": timed(lambda: db.get_tasks_by_status("in_progress"), budget, max_runs),
+        "db.update_q_value": timed(lambda: db.update_q_value(rng.randint(1, n), rng.random()), budget, max_runs),
+        "db.update_task_status": timed(
+            lambda: db.update_task_status(rng.randint(1, n), "in_progress"), budget, max_runs
+        )
+    })
+    db.close()
+    return results
+
+
+def bench_endpoints(n, rng, budget, max_runs):
+    from fastapi.testclient import TestClient
+
+    # app reads its data from relative paths at import time
+    if "app" in sys.modules:
+        app_module = importlib.reload(sys.modules["app"])
+    else:
+        app_module = importlib.import_module("app")
+    client = TestClient(app_module.app)
+
+    def request(method, url):
+        response = client.request(method, url)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {url} -> {response.status_code}: {response.text[:200]}")
+
+    results = {
+        "GET /tasks": timed(lambda: request("GET", "/tasks"), budget, max_runs),
+        "POST /suggest": timed(lambda: request("POST", "/suggest"), budget, max_runs),
+        "POST /feedback": timed(
+            lambda: request("POST", f"/feedback/{rng.randint(1, n)}/{rng.random():.3f}"), budget, max_runs
+        )
+    }
+    app_module.rl.close()
+    app_module.langchain_agent.health.stop()
+    return results
+
+
+def run_size(n, budget, max_runs, seed=0):
+    """Run every benchmark for one task-set size in a scratch directory"""
+    tasks = make_tasks(n, seed)
+    rng = random.Random(seed)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=f"rl-bench-{n}-") as workdir:
+        os.chdir(workdir)
+        try:
+            os.makedirs("task_agent/data")
+            with open("task_agent/data/tasks.json", "w") as f:
+                json.dump(tasks, f)
+            with open("task_agent/data/agent_memory.json", "w") as f:
+                json.dump(make_q_table(n, seed), f)
+
+            results = {}
+            for name, bench in (
+                ("RLModel", lambda: bench_rl_model(tasks, n, rng, budget, max_runs)),
+                ("TaskDatabase", lambda: bench_database(tasks, n, rng, budget, max_runs)),
+                ("endpoints", lambda: bench_endpoints(n, rng, budget, max_runs))
+            ):
+                print(f"  {name}...", flush=True)
+                results.update(bench())
+            return results
+        finally:
+            os.chdir(cwd)
+
+
+def compare(current, baseline, threshold):
+    """Median-time ratios against a baseline; returns (rows, regressions)"""
+    rows = []
+    regressions = []
+    for size, benches in current["results"].items():
+        for name, result in benches.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            ratio = result["median_ms"] / base["median_ms"] if base["median_ms"] else float("inf")
+            # Ignore sub-0.05ms differences, they are timer noise
+            regressed = ratio > 1 + threshold and result["median_ms"] - base["median_ms"] > 0.05
+            row = (size, name, base["median_ms"], result["median_ms"], ratio, regressed)
+            rows.append(row)
+            if regressed:
+                regressions.append(row)
+    return rows, regressions
+
+
+def print_results(results):
+    for size, benches in results.items():
+        print(f"\n=== {int(size):,} tasks ===")
+        print(f"{'Benchmark':<28} {'Runs':>6} {'Median ms':>11} {'p95 ms':>11}")
+        for name, result in benches.items():
+            print(f"{name:<28} {result['runs']:>6} {result['median_ms']:>11.3f} {result['p95_ms']:>11.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RLModel, TaskDatabase and the API")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds per benchmark")
+    parser.add_argument("--max-runs", type=int, default=200)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a saved results JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    # Keep benchmarks local: no LLM calls or background probes
+    os.environ.setdefault("USE_SQLITE", "false")
+    os.environ["GEMINI_API_KEY"] = ""
+    os.environ["HUGGINGFACE_API_KEY"] = ""
+    os.environ["OLLAMA_URL"] = "http://127.0.0.1:9"
+    os.environ["PROVIDER_HEALTH_INTERVAL"] = "0"
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "budget_seconds": args.budget,
+            "max_runs": args.max_runs
+        },
+        "results": {}
+    }
+    for n in args.sizes:
+        print(f"Benchmarking {n:,} tasks", flush=True)
+        report["results"][str(n)] = run_size(n, args.budget, args.max_runs)
+    print_results(report["results"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        rows, regressions = compare(report, baseline, args.threshold)
+        print(f"\n=== Comparison with {args.baseline} ===")
+        print(f"{'Size':>9} {'Benchmark':<28} {'Base ms':>10} {'Now ms':>10} {'Ratio':>7}")
+        for size, name, base, now, ratio, regressed in rows:
+            flag = "  REGRESSION" if regressed else ""
+            print(f"{int(size):>9,} {name:<28} {base:>10.3f} {now:>10.3f} {ratio:>6.2f}x{flag}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()